@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the engine, renderer and audio synthesis
+
+Micro benchmarks time single engine operations on representative boards;
+macro benchmarks time whole frames and music synthesis under SDL's dummy
+drivers. Results are saved as JSON and can be compared against a baseline.
+
+    python benchmarks/run_benchmarks.py --save results.json
+    python benchmarks/run_benchmarks.py --update-baseline
+    python benchmarks/run_benchmarks.py            # compares with the baseline
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+# Headless SDL before pygame is imported anywhere
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+from tetris.bitboard import BitBoard
+from tetris.board import GridBoard
+from tetris.engine import TetrisEngine, ACTION_HARD_DROP, ACTION_NOOP
+from tetris.pieces import PIECE_TYPES
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+BACKENDS = {'grid': GridBoard, 'bit': BitBoard}
+
+# Representative stacks: first filled row (from the top) for each board
+BOARD_FILLS = {'empty': None, 'half': 10, 'near_top': 3}
+
+
+def make_engine(board_class, fill, seed=1, full_rows=0):
+    """Engine with a deterministic ragged stack from row `fill` down
+
+    Every stacked row keeps one to three holes so nothing clears by
+    accident; `full_rows` bottom rows are completely filled instead.
+    """
+    engine = TetrisEngine(board_class=board_class, seed=seed)
+    board = engine.board
+    rng = random.Random(seed)
+    if fill is not None:
+        for y in range(fill, board.height):
+            holes = rng.sample(range(board.width), rng.randint(1, 3))
+            for x in range(board.width):
+                if x not in holes:
+                    board.set_cell(x, y, rng.choice(PIECE_TYPES))
+    for y in range(board.height - full_rows, board.height):
+        for x in range(board.width):
+            board.set_cell(x, y, rng.choice(PIECE_TYPES))
+    engine.board_version += 1
+
+    # A T piece at spawn with room to move and rotate
+    engine.current_type = engine.current_piece = 'T'
+    engine.current_x, engine.current_y, engine.current_rotation = 4, 1, 0
+    return engine
+
+
+def time_per_op(run, ops, repeats):
+    """Best-of-`repeats` time of run() divided by the ops it performs, in us"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return 1e6 * best / ops
+
+
+def time_per_op_fresh(make_state, operation, ops, repeats):
+    """Like time_per_op, but each op gets its own untimed copy of the state"""
+    best = float('inf')
+    for _ in range(repeats):
+        states = [make_state() for _ in range(ops)]
+        start = time.perf_counter()
+        for state in states:
+            operation(state)
+        best = min(best, time.perf_counter() - start)
+    return 1e6 * best / ops
+
+
+def backend_mismatches(games, ticks=3000):
+    """Seeds whose games differ between the grid and bit backends
+
+    Both play the same seeded random inputs, with garbage pushed in now and
+    then (versus mode); their snapshots are compared after every tick. A
+    faster backend only counts if it plays the same game.
+    """
+    mismatches = []
+    for seed in range(games):
+        grid = TetrisEngine(board_class=GridBoard, seed=seed)
+        bit = TetrisEngine(board_class=BitBoard, seed=seed)
+        rng = random.Random(seed)
+        for _ in range(ticks):
+            if rng.random() < 0.02:
+                count, hole = rng.randint(1, 4), rng.randrange(grid.board.width)
+                grid.receive_garbage(count, hole)
+                bit.receive_garbage(count, hole)
+            action = rng.choice((0, 1, 2, 3, ACTION_NOOP, ACTION_NOOP, ACTION_HARD_DROP))
+            for engine in (grid, bit):
+                engine.apply(action)
+                engine.tick()
+            if grid.snapshot() != bit.snapshot():
+                mismatches.append(seed)
+                break
+            if grid.game_over:
+                break
+    return mismatches
+
+
+def engine_benchmarks(scale, repeats):
+    results = {}
+    n = 2000 * scale
+    for backend, board_class in BACKENDS.items():
+        for fill_name, fill in BOARD_FILLS.items():
+            tag = f"{backend}/{fill_name}"
+            engine = make_engine(board_class, fill)
+
+            # Positions a move search would probe: valid and colliding
+            probes = [(x, y, r) for x in range(-1, 11) for y in (0, 5, 10, 15, 18) for r in range(4)]
+            is_valid = engine.is_valid_position
+            fits = engine.board.fits
+
+            def run_fits():
+                for _ in range(n // len(probes) + 1):
+                    for x, y, r in probes:
+                        fits('T', r, x, y)
+            results[f"fits/{tag}"] = time_per_op(
+                run_fits, (n // len(probes) + 1) * len(probes), repeats)
+
+            def run_valid():
+                for _ in range(n // len(probes) + 1):
+                    for x, y, r in probes:
+                        is_valid(x, y, r)
+            results[f"is_valid_position/{tag}"] = time_per_op(
+                run_valid, (n // len(probes) + 1) * len(probes), repeats)
+
+            def run_drop_distance():
+                for _ in range(n):
+                    engine.drop_distance()
+            results[f"drop_distance/{tag}"] = time_per_op(run_drop_distance, n, repeats)
+
+            def run_move():
+                for _ in range(n // 2):
+                    engine.move_piece(1, 0)
+                    engine.move_piece(-1, 0)
+            results[f"move_piece/{tag}"] = time_per_op(run_move, n, repeats)
+
+            def run_rotate():
+                for _ in range(n):
+                    engine.rotate_piece()
+            results[f"rotate_piece/{tag}"] = time_per_op(run_rotate, n, repeats)
+
+            # Piece resting on the stack, so placing it is realistic
+            template = make_engine(board_class, fill)
+            while template.move_piece(0, 1):
+                pass
+            results[f"place_piece/{tag}"] = time_per_op_fresh(
+                lambda: copy.deepcopy(template), TetrisEngine.place_piece, 200 * scale, repeats)
+
+        template = make_engine(board_class, BOARD_FILLS['half'], full_rows=4)
+        results[f"clear_lines/{backend}/four_rows"] = time_per_op_fresh(
+            lambda: copy.deepcopy(template), TetrisEngine.clear_lines, 200 * scale, repeats)
+
+        def run_game():
+            engine = TetrisEngine(board_class=board_class, seed=7)
+            rng = random.Random(7)
+            for _ in range(5000 * scale):
+                engine.apply(rng.randrange(4))
+                engine.tick()
+                if engine.game_over:
+                    engine.reset(rng.getrandbits(32))
+        results[f"headless_tick/{backend}"] = time_per_op(run_game, 5000 * scale, repeats)
+    return results
+
+
+def render_benchmarks(scale, repeats):
+    from tetris.constants import SCREEN_WIDTH, SCREEN_HEIGHT
+    from tetris.display import Display
+    from tetris.retro_tetris import RetroTetris
+
+    pygame.init()
+    # Software integer scaling to a 4K window: 3x, so presenting is timed too
+    display = Display((SCREEN_WIDTH, SCREEN_HEIGHT), window_size=(3840, 2160), mode='integer')
+    game = RetroTetris(display.surface, seed=3)
+    rng = random.Random(3)
+    frames = 300 * scale
+
+    def play_frame():
+        game.engine.apply(rng.randrange(4))
+        game.update(0.05)
+        if game.game_over:
+            game.restart()
+
+    def run_incremental():
+        for _ in range(frames):
+            play_frame()
+            game.render()
+
+    def run_full():
+        for _ in range(frames):
+            play_frame()
+            game.renderer.invalidate()
+            game.render()
+
+    def run_presented():
+        for _ in range(frames):
+            play_frame()
+            display.present(game.render())
+
+    results = {
+        'render/frame': time_per_op(run_incremental, frames, repeats),
+        'render/full_redraw': time_per_op(run_full, frames, repeats),
+        'render/present_4k': time_per_op(run_presented, frames, repeats),
+    }
+    game.cleanup()
+    pygame.quit()
+    return results
+
+
+def audio_benchmarks(scale, repeats):
+    import tetris.synth as synth
+    from tetris.universal_audio import UniversalAudio
+
+    pygame.init()
+    audio = UniversalAudio()
+    cache_dir = tempfile.mkdtemp(prefix='tetris-bench-')
+    synth.CACHE_DIR = cache_dir
+
+    def cold():
+        # No memo, no disk cache: full synthesis
+        for name in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, name))
+        synth._memo.clear()
+        audio.music_sound = None
+        audio.create_simple_music_data()
+
+    def warm_disk():
+        # Fresh process after the first launch: load from the PCM cache
+        synth._memo.clear()
+        audio.music_sound = None
+        audio.create_simple_music_data()
+
+    results = {'audio/create_simple_music_data/cold': time_per_op(cold, 1, repeats)}
+    cold()
+    results['audio/create_simple_music_data/disk_cache'] = time_per_op(warm_disk, 1, repeats)
+
+    audio.cleanup()
+    pygame.quit()
+    return results
+
+
+def backend_speedups(results):
+    """Print how many times faster the bit backend runs each engine benchmark"""
+    print(f"\n{'benchmark':<48} {'grid us':>10} {'bit us':>10} {'speedup':>8}")
+    for name in sorted(results):
+        parts = name.split('/')
+        if len(parts) < 2 or parts[1] != 'grid':
+            continue
+        bit = results.get('/'.join([parts[0], 'bit'] + parts[2:]))
+        if bit:
+            grid = results[name]
+            print(f"{name.replace('/grid', '', 1):<48} {grid:>10.2f} {bit:>10.2f} {grid / bit:>7.2f}x")
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison table; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<48} {'baseline us':>12} {'now us':>10} {'change':>8}")
+    for name in sorted(results):
+        now = results[name]
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<48} {'-':>12} {now:>10.2f} {'new':>8}")
+            continue
+        change = now / before - 1.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<48} {before:>12.2f} {now:>10.2f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retro Tetris benchmark suite")
+    parser.add_argument('--save', metavar='PATH', help="write results as JSON")
+    parser.add_argument('--baseline', metavar='PATH', default=DEFAULT_BASELINE,
+                        help="baseline JSON to compare against (default: %(default)s)")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="slowdown ratio flagged as a regression (default: %(default)s)")
+    parser.add_argument('--suite', choices=['engine', 'render', 'audio'], action='append',
+                        help="run only these suites (repeatable)")
+    parser.add_argument('--scale', type=int, default=1, help="multiply iteration counts")
+    parser.add_argument('--repeats', type=int, default=5, help="best-of repeats per case")
+    args = parser.parse_args(argv)
+
+    suites = args.suite or ['engine', 'render', 'audio']
+    results = {}
+    if 'engine' in suites:
+        mismatches = backend_mismatches(100 * args.scale)
+        if mismatches:
+            print(f"Backends disagree on seed(s) {mismatches}; fix that before timing them")
+            return 1
+        results.update(engine_benchmarks(args.scale, args.repeats))
+    if 'render' in suites:
+        results.update(render_benchmarks(args.scale, args.repeats))
+    if 'audio' in suites:
+        results.update(audio_benchmarks(args.scale, args.repeats))
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pygame': pygame.version.ver,
+            'unit': 'microseconds per operation (best of repeats)',
+        },
+        'results': results,
+    }
+
+    for path in filter(None, [args.save, args.baseline if args.update_baseline else None]):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Saved results to {path}")
+
+    regressions = []
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+    else:
+        compare(results, {}, args.threshold)
+    if 'engine' in suites:
+        backend_speedups(results)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,52 +1,200 @@
+import time
+_launched = time.perf_counter()  # --profile-startup times the imports below from here
+import argparse
+import logging
 import pygame
+import signal
 import sys
-import time
+import threading
+from tetris.mixer_profile import DEFAULT_PROFILE, PROFILES, measure_latency, print_report
+from tetris.bot import AutoPlayer
+from tetris.cli import non_negative_int, positive_int
+from tetris.constants import BOARD_WIDTH, BOARD_HEIGHT, SCREEN_WIDTH, SCREEN_HEIGHT
+from tetris.display import SCALE_MODES, Display, parse_size
+from tetris.keyboard import DEFAULT_ARR, DEFAULT_DAS, KeyboardInput
+from tetris.log import configure as configure_logging
+from tetris.renderer import PerfHud
 from tetris.retro_tetris import RetroTetris
+from tetris.telemetry import FrameProfiler, FrameTimings
+from tetris.timing import StartupProfile, dump_histograms
+_imported = time.perf_counter()
+
+logger = logging.getLogger('tetris.main')
+
+# Window events after which the system may have dropped what was on screen
+REDRAW_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWSHOWN,
+                 pygame.WINDOWRESTORED, pygame.WINDOWMAXIMIZED, pygame.WINDOWFOCUSGAINED)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Retro Tetris - Classic 1980s Style")
+    parser.add_argument('--audio-profile', choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help="mixer buffer/sample-rate preset (default: %(default)s)")
+    parser.add_argument('--measure-audio-latency', action='store_true',
+                        help="report audio latency and underruns per buffer size, then exit")
+    parser.add_argument('--seed', type=int, help="seed the piece sequence of the first game")
+    parser.add_argument('--record', metavar='PATH',
+                        help="record the game to a replay file (verify with python -m tetris.replay)")
+    parser.add_argument('--autoplay', action='store_true',
+                        help="let the built-in AI play")
+    parser.add_argument('--fps', type=int, default=60,
+                        help="render frame cap, 0 for uncapped (default: %(default)s)")
+    parser.add_argument('--vsync', action='store_true',
+                        help="sync rendering to the display refresh instead of --fps")
+    parser.add_argument('--window', type=parse_size, metavar='WIDTHxHEIGHT',
+                        help="window size for the integer and fit scale modes (default: the logical 800x600)")
+    parser.add_argument('--fullscreen', action='store_true',
+                        help="fill the screen at the desktop resolution")
+    parser.add_argument('--scale', choices=SCALE_MODES, default='scaled',
+                        help="scaled: GPU scaling by SDL; integer: whole-number multiples "
+                             "with black bars; fit: fill keeping the aspect ratio (default: %(default)s)")
+    parser.add_argument('--smooth-fall', action='store_true',
+                        help="interpolate the falling piece between rows")
+    parser.add_argument('--das', type=non_negative_int, default=DEFAULT_DAS,
+                        help="ticks a sideways key is held before it repeats (default: %(default)s)")
+    parser.add_argument('--arr', type=non_negative_int, default=DEFAULT_ARR,
+                        help="ticks between sideways repeats, 0 to shift straight to the wall (default: %(default)s)")
+    parser.add_argument('--latency-report', metavar='PATH',
+                        help="write input latency histograms as JSON on exit")
+    parser.add_argument('--rewind', type=float, default=10.0, metavar='SECONDS',
+                        help="seconds of play kept for rewinding with BACKSPACE, 0 to disable (default: %(default)s)")
+    parser.add_argument('--board-width', type=positive_int, default=BOARD_WIDTH, metavar='COLUMNS',
+                        help="playfield columns, up to hundreds for stress play (default: %(default)s)")
+    parser.add_argument('--board-height', type=positive_int, default=BOARD_HEIGHT, metavar='ROWS',
+                        help="playfield rows, up to thousands (default: %(default)s)")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="report time spent in imports, display init, mixer init and synthesis")
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default='INFO',
+                        help="least severe messages shown (default: %(default)s)")
+    parser.add_argument('--log-file', metavar='PATH',
+                        help="also write log messages to this file")
+    parser.add_argument('--hud', action='store_true',
+                        help="start with the performance HUD shown (F3 toggles it)")
+    parser.add_argument('--telemetry', metavar='PATH',
+                        help="write per-frame timings (.csv, else JSON) on exit and on SIGUSR1")
+    parser.add_argument('--telemetry-frames', type=positive_int, default=3600, metavar='FRAMES',
+                        help="frames of timings kept (default: %(default)s)")
+    parser.add_argument('--profile-frames', type=positive_int, default=300, metavar='FRAMES',
+                        help="frames captured with cProfile when F9 is pressed (default: %(default)s)")
+    parser.add_argument('--profile-output', default='frame_profile.prof', metavar='PATH',
+                        help="where the F9 capture is written (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.vsync and args.scale != 'scaled':
+        parser.error("--vsync needs --scale scaled")
+    return args
 
 def main():
-    # Initialize Pygame
-    pygame.init()
+    args = parse_args()
+    # Messages are queued and written by a background thread, never the game loop
+    configure_logging(args.log_level, path=args.log_file)
+    startup = StartupProfile(origin=_launched)
+    startup.add('imports', _launched, _imported)
     
-    # Classic arcade resolution
-    WINDOW_WIDTH = 800
-    WINDOW_HEIGHT = 600
-    FPS = 60
+    if args.measure_audio_latency:
+        pygame.init()
+        print_report(measure_latency())
+        pygame.quit()
+        return
     
-    # Create display
-    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-    pygame.display.set_caption("Retro Tetris - Classic 1980s Style with Audio")
+    # Only the display and fonts here: pygame.init() would also open a mixer
+    # that the audio thread then has to close and reopen with its profile
+    with startup.phase('display init'):
+        pygame.display.init()
+        pygame.font.init()
+        # The game draws at the classic arcade resolution; the display
+        # scales that to the window in one pass per frame
+        display = Display((SCREEN_WIDTH, SCREEN_HEIGHT), window_size=args.window,
+                          fullscreen=args.fullscreen, mode=args.scale, vsync=args.vsync)
+        pygame.display.set_caption("Retro Tetris - Classic 1980s Style with Audio")
     clock = pygame.time.Clock()
     
-    # Create classic Tetris game
-    game = RetroTetris(screen, WINDOW_WIDTH, WINDOW_HEIGHT)
+    # Create classic Tetris game (audio carries on loading in the background)
+    with startup.phase('game init'):
+        game = RetroTetris(display.surface, SCREEN_WIDTH, SCREEN_HEIGHT, audio_profile=args.audio_profile,
+                           seed=args.seed, record_path=args.record,
+                           controller=AutoPlayer() if args.autoplay else None,
+                           keyboard=KeyboardInput(das=args.das, arr=args.arr, wall=args.board_width),
+                           rewind_seconds=args.rewind, startup=startup,
+                           board_width=args.board_width, board_height=args.board_height)
+    game.renderer.interpolate = args.smooth_fall
+    first_frame = True
+    startup_reported = not args.profile_startup
+    
+    # Where each frame's time goes, for the HUD, dumps and F9 captures
+    timings = FrameTimings(args.telemetry_frames, 1000.0 / (args.fps if args.fps and not args.vsync else 60))
+    hud = PerfHud(timings)
+    hud.visible = args.hud
+    game.renderer.hud = hud
+    profiler = FrameProfiler(args.profile_frames, args.profile_output)
+    # SIGUSR1 asks for a dump; it is written between frames, not in the handler
+    dump_requested = threading.Event()
+    if args.telemetry and hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: dump_requested.set())
     
     try:
-        # Game loop with audio-friendly timing
+        # The simulation runs fixed ticks off the measured frame time, so
+        # game speed does not depend on how fast frames are drawn
         running = True
+        last_time = time.perf_counter()
         while running:
-            dt = clock.tick(FPS) / 1000.0  # Delta time in seconds
-            
-            # Small pause to give audio processing time
-            if dt < 0.016:  # If running faster than 60 FPS
-                time.sleep(0.002)  # 2ms pause for audio breathing room
+            now = time.perf_counter()
+            dt = now - last_time
+            last_time = now
             
-            # Handle events
-            for event in pygame.event.get():
+            # Handle events (stamped as they are read; applied on the next tick)
+            events = pygame.event.get()
+            read_time = time.perf_counter()
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type in REDRAW_EVENTS:
+                    # Only dirty rects are presented, so redraw everything once
+                    game.renderer.invalidate()
+                    display.invalidate()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    hud.toggle()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                    profiler.start()
                 else:
-                    game.handle_input(event)
+                    game.handle_input(event, read_time)
+            events_done = time.perf_counter()
             
             # Update game
             game.update(dt)
+            update_done = time.perf_counter()
             
-            # Render game
-            game.render()
+            # Render game (only the changed areas are pushed to the display)
+            dirty_rects = game.render()
+            render_done = time.perf_counter()
             
-            # Update display
-            pygame.display.flip()
+            # Scale the changed areas up to the window
+            display.present(dirty_rects)
+            present_done = time.perf_counter()
+            game.keyboard.presented()
+            timings.record(1000.0 * (events_done - now), 1000.0 * (update_done - events_done),
+                           1000.0 * (render_done - update_done), 1000.0 * (present_done - render_done),
+                           1000.0 * dt)
+            profiler.frame_done()
+            if dump_requested.is_set():
+                dump_requested.clear()
+                timings.dump(args.telemetry)
+                logger.info("Frame timings written to %s", args.telemetry)
+            if first_frame:
+                startup.mark('first frame')
+                first_frame = False
+            if not startup_reported and game.audio.ready.is_set():
+                logger.info("Startup:\n%s", "\n".join(startup.report()))
+                startup_reported = True
+            if not args.vsync and args.fps:
+                clock.tick(args.fps)
     
     finally:
+        if args.telemetry:
+            timings.dump(args.telemetry)
+        if args.latency_report:
+            histograms = game.keyboard.histograms()
+            dump_histograms(args.latency_report, histograms)
+            for name, histogram in histograms.items():
+                print(f"{name}: {histogram.summary()}")
         # Clean up audio resources
         game.cleanup()
         pygame.quit()
@@ -0,0 +1,59 @@
+import os
+import unittest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from tetris.engine import ACTION_LEFT, ACTION_RIGHT
+from tetris.keyboard import AutoRepeat, KeyboardInput
+
+
+def held_repeats(repeater, ticks):
+    """Repeats due on each of `ticks` ticks after a press"""
+    repeater.press()
+    return [repeater.tick() for _ in range(ticks)]
+
+
+class AutoRepeatTest(unittest.TestCase):
+
+    def test_delay_then_rate(self):
+        self.assertEqual(held_repeats(AutoRepeat(3, 2), 7), [0, 0, 1, 0, 1, 0, 1])
+
+    def test_zero_delay(self):
+        self.assertEqual(held_repeats(AutoRepeat(0, 2), 4), [0, 1, 0, 1])
+        self.assertEqual(held_repeats(AutoRepeat(0, 1), 3), [1, 1, 1])
+
+    def test_zero_rate_bursts_after_delay(self):
+        self.assertEqual(held_repeats(AutoRepeat(2, 0, burst=10), 4), [0, 10, 10, 10])
+
+    def test_zero_delay_and_rate(self):
+        self.assertEqual(held_repeats(AutoRepeat(0, 0, burst=10), 2), [10, 10])
+
+    def test_negative_rejected(self):
+        with self.assertRaises(ValueError):
+            AutoRepeat(-1, 6)
+        with self.assertRaises(ValueError):
+            AutoRepeat(16, -1)
+
+
+class KeyboardInputTest(unittest.TestCase):
+
+    def press(self, keyboard, key):
+        keyboard.push(pygame.event.Event(pygame.KEYDOWN, key=key), timestamp=0.0)
+
+    def test_zero_arr_shifts_to_the_wall(self):
+        keyboard = KeyboardInput(das=1, arr=0, wall=10)
+        self.press(keyboard, pygame.K_LEFT)
+        self.assertEqual(keyboard.tick_actions(), [(ACTION_LEFT, 0.0)])
+        self.assertEqual(keyboard.tick_actions(), [(ACTION_LEFT, None)] * 10)
+
+    def test_zero_das_repeats_from_the_next_tick(self):
+        keyboard = KeyboardInput(das=0, arr=1)
+        self.press(keyboard, pygame.K_RIGHT)
+        self.assertEqual(keyboard.tick_actions(), [(ACTION_RIGHT, 0.0)])
+        self.assertEqual(keyboard.tick_actions(), [(ACTION_RIGHT, None)])
+        self.assertEqual(keyboard.tick_actions(), [(ACTION_RIGHT, None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
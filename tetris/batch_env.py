@@ -0,0 +1,194 @@
+import numpy as np
+from tetris.constants import BOARD_WIDTH, BOARD_HEIGHT
+from tetris.engine import (ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE,
+                           LINE_SCORES, GRAVITY_TABLE)
+from tetris.pieces import PIECES, PIECE_TYPES, ROTATIONS
+
+# Piece offsets as arrays: SHAPES[piece, rotation & 3] -> 4 (dx, dy) pairs
+SHAPES = np.array([ROTATIONS[name] for name in PIECE_TYPES], dtype=np.int32)
+ROTATION_COUNTS = np.array([len(PIECES[name]) for name in PIECE_TYPES], dtype=np.int32)
+SCORE_TABLE = np.array(LINE_SCORES, dtype=np.int64)
+GRAVITY_ROWS = np.array([rows for rows, _ in GRAVITY_TABLE], dtype=np.int32)
+GRAVITY_TICKS = np.array([ticks for _, ticks in GRAVITY_TABLE], dtype=np.int32)
+
+SPAWN_X = 4
+SPAWN_Y = 0
+
+
+def _read_only(array):
+    """Zero-copy view that callers cannot write through"""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class BatchTetris:
+    """N independent Tetris games stepped together with NumPy
+
+    Follows the TetrisEngine rules: same piece tables, collision, soft drop
+    bonus, line scoring and gravity table. Each step applies one action per
+    game and then advances gravity by `ticks_per_step` engine ticks, which
+    can drop several rows. Boards hold 0 for empty
+    cells and piece index + 1 (into PIECE_TYPES) for filled ones.
+    """
+
+    def __init__(self, num_games, seed=None, ticks_per_step=1):
+        self.num_games = num_games
+        self.ticks_per_step = ticks_per_step
+        self.rng = np.random.default_rng(seed)
+
+        # Stacked game state
+        self.boards = np.zeros((num_games, BOARD_HEIGHT, BOARD_WIDTH), dtype=np.uint8)
+        self.piece = np.zeros(num_games, dtype=np.int32)
+        self.x = np.zeros(num_games, dtype=np.int32)
+        self.y = np.zeros(num_games, dtype=np.int32)
+        self.rotation = np.zeros(num_games, dtype=np.int32)
+        self.score = np.zeros(num_games, dtype=np.int64)
+        self.lines = np.zeros(num_games, dtype=np.int32)
+        self.level = np.zeros(num_games, dtype=np.int32)
+        self.fall_time = np.zeros(num_games, dtype=np.int32)  # Gravity accumulator
+        self.gravity_rows = np.zeros(num_games, dtype=np.int32)
+        self.gravity_ticks = np.zeros(num_games, dtype=np.int32)
+        self.game_over = np.zeros(num_games, dtype=bool)
+        self.rewards = np.zeros(num_games, dtype=np.int64)
+
+        # Observations are read-only views over the live state arrays
+        self.observation = {
+            'board': _read_only(self.boards),
+            'piece': _read_only(self.piece),
+            'x': _read_only(self.x),
+            'y': _read_only(self.y),
+            'rotation': _read_only(self.rotation),
+            'score': _read_only(self.score),
+            'lines': _read_only(self.lines),
+            'level': _read_only(self.level),
+        }
+        self._reward_view = _read_only(self.rewards)
+        self._done_view = _read_only(self.game_over)
+
+        self.reset()
+
+    def reset(self, mask=None):
+        """Reset every game, or only those selected by a boolean mask"""
+        games = np.arange(self.num_games) if mask is None else np.flatnonzero(mask)
+        self.boards[games] = 0
+        self.score[games] = 0
+        self.lines[games] = 0
+        self.level[games] = 0
+        self.fall_time[games] = 0
+        self.gravity_rows[games] = GRAVITY_ROWS[0]
+        self.gravity_ticks[games] = GRAVITY_TICKS[0]
+        self.game_over[games] = False
+        self._spawn(games)
+        return self.observation
+
+    def _fits(self, games, x, y, rotation):
+        """Vectorized is_valid_position for the selected games"""
+        cells = SHAPES[self.piece[games], rotation & 3]
+        cell_x = x[:, None] + cells[:, :, 0]
+        cell_y = y[:, None] + cells[:, :, 1]
+
+        in_bounds = (cell_x >= 0) & (cell_x < BOARD_WIDTH) & (cell_y < BOARD_HEIGHT)
+        occupied = self.boards[
+            games[:, None],
+            np.clip(cell_y, 0, BOARD_HEIGHT - 1),
+            np.clip(cell_x, 0, BOARD_WIDTH - 1),
+        ] != 0
+        # Cells above the board never collide
+        blocked = occupied & (cell_y >= 0)
+        return (in_bounds & ~blocked).all(axis=1)
+
+    def _spawn(self, games):
+        """Give the selected games a new random piece"""
+        self.piece[games] = self.rng.integers(0, len(PIECE_TYPES), size=len(games))
+        self.x[games] = SPAWN_X
+        self.y[games] = SPAWN_Y
+        self.rotation[games] = 0
+        ok = self._fits(games, self.x[games], self.y[games], self.rotation[games])
+        self.game_over[games[~ok]] = True
+
+    def _shift(self, games, dx, dy):
+        """Move pieces where the target position is free; returns moved games"""
+        if len(games) == 0:
+            return games
+        new_x = self.x[games] + dx
+        new_y = self.y[games] + dy
+        ok = self._fits(games, new_x, new_y, self.rotation[games])
+        moved = games[ok]
+        self.x[moved] = new_x[ok]
+        self.y[moved] = new_y[ok]
+        return moved
+
+    def _lock(self, games):
+        """Place pieces, clear lines, score and spawn for the selected games"""
+        cells = SHAPES[self.piece[games], self.rotation[games] & 3]
+        cell_x = self.x[games, None] + cells[:, :, 0]
+        cell_y = self.y[games, None] + cells[:, :, 1]
+        visible = cell_y >= 0
+        owners = np.broadcast_to(games[:, None], cell_x.shape)
+        colors = np.broadcast_to((self.piece[games] + 1)[:, None], cell_x.shape)
+        self.boards[owners[visible], cell_y[visible], cell_x[visible]] = colors[visible]
+
+        # Line clears: stable-sort full rows to the top, then blank them
+        boards = self.boards[games]
+        full = (boards != 0).all(axis=2)
+        cleared = full.sum(axis=1)
+        if cleared.any():
+            order = np.argsort(~full, axis=1, kind='stable')
+            boards = np.take_along_axis(boards, order[:, :, None], axis=1)
+            boards[np.arange(BOARD_HEIGHT)[None, :] < cleared[:, None]] = 0
+            self.boards[games] = boards
+
+            gained = SCORE_TABLE[cleared] * (self.level[games] + 1)
+            self.score[games] += gained
+            self.rewards[games] += gained
+            self.lines[games] += cleared
+            # Level up every 10 lines with the NES speed curve
+            level = np.maximum(self.level[games], self.lines[games] // 10)
+            self.level[games] = level
+            entry = np.minimum(level, len(GRAVITY_TABLE) - 1)
+            self.gravity_rows[games] = GRAVITY_ROWS[entry]
+            self.gravity_ticks[games] = GRAVITY_TICKS[entry]
+
+        self._spawn(games)
+
+    def step(self, actions):
+        """Apply one ACTION_* per game (ACTION_NOOP to just fall), then gravity
+
+        Returns (observation, rewards, game_over), all read-only views that
+        stay live across steps. Finished games ignore their action until
+        reset().
+        """
+        actions = np.asarray(actions)
+        self.rewards[:] = 0
+        active = ~self.game_over
+
+        self._shift(np.flatnonzero(active & (actions == ACTION_LEFT)), -1, 0)
+        self._shift(np.flatnonzero(active & (actions == ACTION_RIGHT)), 1, 0)
+
+        dropped = self._shift(np.flatnonzero(active & (actions == ACTION_DOWN)), 0, 1)
+        self.score[dropped] += 1  # Soft drop bonus
+        self.rewards[dropped] += 1
+
+        rotating = np.flatnonzero(active & (actions == ACTION_ROTATE))
+        if len(rotating):
+            new_rotation = (self.rotation[rotating] + 1) % ROTATION_COUNTS[self.piece[rotating]]
+            ok = self._fits(rotating, self.x[rotating], self.y[rotating], new_rotation)
+            self.rotation[rotating[ok]] = new_rotation[ok]
+
+        # Gravity: one pass per row due, games drop out as they land
+        self.fall_time[active] += self.gravity_rows[active] * self.ticks_per_step
+        due = np.where(active, self.fall_time // self.gravity_ticks, 0)
+        falling = np.flatnonzero(due)
+        while len(falling):
+            self.fall_time[falling] -= self.gravity_ticks[falling]
+            due[falling] -= 1
+            moved = self._shift(falling, 0, 1)
+            landed = np.setdiff1d(falling, moved, assume_unique=True)
+            if len(landed):
+                self.fall_time[landed] = 0
+                due[landed] = 0
+                self._lock(landed)
+            falling = np.flatnonzero(due)
+
+        return self.observation, self._reward_view, self._done_view
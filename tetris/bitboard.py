@@ -0,0 +1,309 @@
+from array import array
+from tetris.board import PIECE_CODES, StackIndex
+from tetris.constants import BOARD_WIDTH, BOARD_HEIGHT
+from tetris.pieces import PIECE_TYPES, CELL_TYPES, GARBAGE, ROTATIONS
+
+# Piece offsets reach two cells either side of the pivot
+MASK_PADDING = 2
+
+# Always-empty rows kept above the board so pieces poking out of the top
+# can be tested without a negative-index check; only a piece lifted further
+# by garbage (see fits()) needs one
+CEILING = 2
+
+# Largest board, in bits, kept packed into one integer: past a few KB every
+# shift of it costs more than testing the piece's rows one at a time
+PACKED_MAX_BITS = 1 << 14
+
+# Array typecodes for row masks by the widest board they hold; wider boards
+# keep a list of ints
+_ROW_TYPECODES = ((8, 'B'), (16, 'H'), (32, 'L'), (64, 'Q'))
+
+# Mask entry for columns where the piece would stick out of the board; its
+# bottom offset fails the floor test for every row
+BLOCKED = (1 << 30, 0, ())
+
+# Shared mask tables, built once per board width
+_mask_tables = {}
+
+# Cell code -> ASCII '0'/'1', so a row of codes parses as a binary number
+_CODE_BITS = bytes(b'0'[0] if code == 0 else b'1'[0] for code in range(256))
+
+
+def row_stride(width):
+    """Bits per row in BitBoard.packed: the width rounded up to whole bytes"""
+    return -(-width // 8) * 8
+
+
+def build_piece_masks(width):
+    """Precompute collision masks per (piece, rotation, column)
+
+    Each entry is (bottom_dy, shape, groups), or BLOCKED when the piece
+    would stick out of the board at that column. `shape` is the whole piece
+    as one mask laid out like BitBoard.packed for a piece at y = 0; groups
+    holds one (row_offset, row_mask, cells) triple per row the piece covers,
+    with the row offset already shifted by CEILING. `cells` lists the
+    absolute columns for colour bookkeeping.
+    """
+    tables = _mask_tables.get(width)
+    if tables is not None:
+        return tables
+
+    tables = {}
+    stride = row_stride(width)
+    for piece_type in PIECE_TYPES:
+        rotations = []
+        for shape in ROTATIONS[piece_type]:
+            columns = []
+            for x in range(-MASK_PADDING, width + MASK_PADDING):
+                if any(not 0 <= x + dx < width for dx, dy in shape):
+                    columns.append(BLOCKED)
+                    continue
+
+                groups = {}
+                for dx, dy in shape:
+                    groups.setdefault(dy, []).append(x + dx)
+                groups = tuple(
+                    (dy + CEILING, sum(1 << cx for cx in cells), tuple(cells))
+                    for dy, cells in sorted(groups.items())
+                )
+                whole = sum(mask << row * stride for row, mask, _ in groups)
+                columns.append((max(dy for _, dy in shape), whole, groups))
+            rotations.append(columns)
+        tables[piece_type] = rotations
+
+    _mask_tables[width] = tables
+    return tables
+
+
+class BitBoard(StackIndex):
+    """Board backend storing each row as an integer bitmask
+
+    Bit x of rows[y + CEILING] is set when cell (x, y) is filled. Up to
+    PACKED_MAX_BITS, `packed` holds the same rows in one integer, `stride`
+    bits each with the top padding row lowest, so a collision test is a
+    single AND against a whole-piece mask; bigger boards leave it None and
+    test row by row. Like the index counts, the rows are a fixed-width array
+    (a list past 64 columns) to keep an idle board small. Piece types live
+    in a separate bytearray (0 = empty, otherwise index into CELL_TYPES + 1)
+    so the collision path never touches them.
+    """
+
+    __slots__ = ('width', 'height', 'rows', 'packed', 'stride', 'colors', 'masks')
+
+    def __init__(self, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        self.width = width
+        self.height = height
+        self.stride = row_stride(width)
+        self.masks = build_piece_masks(width)
+        self.clear()
+
+    def clear(self):
+        """Empty every cell"""
+        self.rows = self._row_store([0] * (CEILING + self.height))
+        self.packed = 0 if self.stride * len(self.rows) <= PACKED_MAX_BITS else None
+        self.colors = bytearray(self.width * self.height)
+        self._reset_index()
+
+    def _row_store(self, rows):
+        """Row masks in the most compact store that holds this board's width"""
+        for bits, typecode in _ROW_TYPECODES:
+            if self.width <= bits and array(typecode).itemsize * 8 >= bits:
+                return array(typecode, rows)
+        return rows
+
+    def _pack(self):
+        """Rebuild `packed` from `rows`"""
+        if self.packed is None:
+            return
+        size = self.stride // 8
+        self.packed = int.from_bytes(b''.join(row.to_bytes(size, 'little') for row in self.rows), 'little')
+
+    @property
+    def full_row(self):
+        """Mask of a completely filled row"""
+        return (1 << self.width) - 1
+
+    def get(self, x, y):
+        """Piece type filling cell (x, y), or None"""
+        code = self.colors[y * self.width + x]
+        return CELL_TYPES[code - 1] if code else None
+
+    def set_cell(self, x, y, piece_type):
+        """Fill (or with None, empty) a single cell"""
+        was_filled = self.colors[y * self.width + x] != 0
+        bit = 1 << x
+        packed_bit = bit << (y + CEILING) * self.stride if self.packed is not None else 0
+        if piece_type is None:
+            self.rows[y + CEILING] &= ~bit
+            if packed_bit:
+                self.packed &= ~packed_bit
+            self.colors[y * self.width + x] = 0
+        else:
+            self.rows[y + CEILING] |= bit
+            if packed_bit:
+                self.packed |= packed_bit
+            self.colors[y * self.width + x] = CELL_TYPES.index(piece_type) + 1
+        self._index_set(x, y, was_filled, piece_type is not None)
+
+    def codes(self, top=0, bottom=None):
+        """Row-major bytes of cell codes (0 = empty, CELL_TYPES index + 1), rows top..bottom-1"""
+        if bottom is None:
+            bottom = self.height
+        return bytes(self.colors[top * self.width:bottom * self.width])
+
+    def load_codes(self, codes):
+        """Replace every cell from row-major codes, as returned by codes()"""
+        width = self.width
+        self.colors = bytearray(codes)
+        # Column 0 is bit 0, so each row's digits are read right to left
+        self.rows = self._row_store([0] * CEILING + [
+            int(codes[y * width:(y + 1) * width].translate(_CODE_BITS)[::-1], 2)
+            for y in range(self.height)
+        ])
+        self._pack()
+        self._rebuild_index()
+
+    def fits(self, piece_type, rotation, x, y):
+        """Check whether a piece fits at (x, y) - cells above the board are allowed"""
+        if x < -MASK_PADDING:
+            return False
+        try:
+            bottom, shape, groups = self.masks[piece_type][rotation & 3][x + MASK_PADDING]
+        except IndexError:
+            return False
+        if y + bottom >= self.height:
+            return False
+
+        packed = self.packed
+        if packed is None:
+            return self._fits_rows(groups, y)
+        if y < 0:
+            # Lifted past the padding rows by garbage: the rows shifted out
+            # are above the board, where everything is empty
+            return not packed & shape >> -y * self.stride
+        return not packed & shape << y * self.stride
+
+    def _fits_rows(self, groups, y):
+        """fits() for boards too big to pack: test the piece a row at a time"""
+        rows = self.rows
+        if y < 0 and y + groups[0][0] < 0:
+            # A negative index would read the bottom rows instead
+            return not any(rows[y + row] & mask for row, mask, _ in groups if y + row >= 0)
+        for row, mask, _ in groups:
+            if rows[y + row] & mask:
+                return False
+        return True
+
+    def place(self, piece_type, rotation, x, y):
+        """Write a piece into the board (cells above the board are dropped)
+
+        Returns the rows this placement completed, top first. The index is
+        updated a row group at a time, and a row is complete when its mask
+        is full - no per-cell bookkeeping.
+        """
+        _, shape, groups = self.masks[piece_type][rotation & 3][x + MASK_PADDING]
+        code = PIECE_CODES[piece_type]
+        rows = self.rows
+        colors = self.colors
+        row_fill = self.row_fill
+        heights = self.column_heights
+        width = self.width
+        height = self.height
+        full = (1 << width) - 1
+
+        completed = []
+        for row, mask, cells in groups:
+            board_y = y + row - CEILING
+            if 0 <= board_y < height:
+                filled = rows[y + row] | mask
+                rows[y + row] = filled
+                row_fill[board_y] += len(cells)
+                offset = board_y * width
+                for cx in cells:
+                    colors[offset + cx] = code
+                    if height - board_y > heights[cx]:
+                        heights[cx] = height - board_y
+                if filled == full:
+                    completed.append(board_y)
+
+        if self.packed is not None:
+            # Cells above the board are dropped here too, padding rows stay empty
+            stride = self.stride
+            placed = shape << y * stride if y >= 0 else shape >> -y * stride
+            self.packed |= placed >> CEILING * stride << CEILING * stride
+        return completed
+
+    def clear_full_rows(self, rows=None):
+        """Remove completed rows in one compaction pass and return the count
+
+        `rows` limits the check to the rows a placement completed (see
+        place()); by default the row fill counts are consulted.
+        """
+        cleared = self.full_rows() if rows is None else sorted(
+            y for y in rows if self.row_fill[y] == self.width)
+        if not cleared:
+            return 0
+
+        # Drop the rows in place, bottom first so indexes above stay put, and
+        # open as many empty ones under the ceiling: C-level moves, no copies
+        width = self.width
+        rows = self.rows
+        colors = self.colors
+        for y in reversed(cleared):
+            del rows[y + CEILING]
+            del colors[y * width:(y + 1) * width]
+
+        # Same for the packed rows, a run of adjacent rows at a time and top
+        # run first so the rows below stay put: the part above each run moves
+        # down over it and empty padding rows open at the top
+        packed = self.packed
+        if packed is not None:
+            stride = self.stride
+            runs = []
+            for y in cleared:
+                if runs and runs[-1][1] == y:
+                    runs[-1][1] = y + 1
+                else:
+                    runs.append([y, y + 1])
+            for first, last in runs:
+                start = (first + CEILING) * stride
+                end = (last + CEILING) * stride
+                packed = packed >> end << end | (packed & (1 << start) - 1) << end - start
+            self.packed = packed
+
+        lines_cleared = len(cleared)
+        rows[CEILING:CEILING] = rows[:1] * lines_cleared  # Padding rows are empty
+        colors[:0] = bytes(lines_cleared * width)
+        self._index_clear(cleared)
+        return lines_cleared
+
+    def _index_column(self, x, top=0):
+        """Recompute the height of column x from its bit, scanning down from row `top`"""
+        bit = 1 << x
+        rows = self.rows
+        end = CEILING + self.height
+        y = CEILING + top
+        while y < end and not rows[y] & bit:
+            y += 1
+        self.column_heights[x] = end - y
+
+    def insert_garbage(self, count, hole):
+        """Push `count` garbage rows, full but for column `hole`, in from the bottom
+
+        Returns True when filled cells were pushed off the top, or when
+        there is more garbage than the board is tall.
+        """
+        width = self.width
+        overflow = count > self.height
+        count = min(count, self.height)
+        overflow = overflow or any(self.rows[CEILING:CEILING + count])
+        garbage = self.full_row & ~(1 << hole)
+        self.rows = self._row_store([0] * CEILING + list(self.rows[CEILING + count:]) + [garbage] * count)
+        self._pack()
+
+        line = bytearray([CELL_TYPES.index(GARBAGE) + 1]) * width
+        line[hole] = 0
+        self.colors = self.colors[count * width:] + line * count
+        self._index_garbage(count)
+        return overflow
@@ -0,0 +1,282 @@
+from array import array
+from tetris.constants import BOARD_WIDTH, BOARD_HEIGHT
+from tetris.pieces import PIECES, CELL_TYPES, GARBAGE, ROTATIONS, COLUMN_BOTTOMS
+
+# Compact cell codes: 0 = empty, otherwise index into CELL_TYPES + 1
+PIECE_CODES = {piece_type: i + 1 for i, piece_type in enumerate(CELL_TYPES)}
+PIECE_CODES[None] = 0
+
+# Cell codes fit in a nibble: low nibble first, then the high one
+_HIGH_NIBBLE = bytes((b << 4) & 0xFF for b in range(256))
+_LOW_OF = bytes(b & 0x0F for b in range(256))
+_HIGH_OF = bytes(b >> 4 for b in range(256))
+
+
+def pack_codes(codes):
+    """Pack cell codes (see PIECE_CODES) two per byte"""
+    codes = bytes(codes)
+    if len(codes) & 1:
+        codes += b'\x00'
+    low = codes[0::2]
+    high = codes[1::2].translate(_HIGH_NIBBLE)
+    return (int.from_bytes(low, 'little') | int.from_bytes(high, 'little')).to_bytes(len(low), 'little')
+
+
+def unpack_codes(packed, count):
+    """Inverse of pack_codes(): the first `count` cell codes"""
+    packed = bytes(packed)
+    codes = bytearray(2 * len(packed))
+    codes[0::2] = packed.translate(_LOW_OF)
+    codes[1::2] = packed.translate(_HIGH_OF)
+    return bytes(codes[:count])
+
+
+class StackIndex:
+    """Column heights and row fill counts kept up to date by a board
+
+    Backends call _index_place() from place(), _index_clear() from
+    clear_full_rows() and _index_set() from set_cell(), so placements cost
+    O(cells touched) and queries never rescan the grid.
+
+    column_heights[x] - filled height of column x (0 = empty column)
+    row_fill[y]       - filled cells in row y
+    holes             - empty cells under the top of their column, derived
+                        from the two: every covered cell is filled or a hole
+
+    The counts are bytearrays (16-bit arrays on boards past 255 cells a
+    side) rather than lists of ints, which keeps an idle board small.
+    """
+
+    __slots__ = ('column_heights', 'row_fill')
+
+    def _counters(self, size):
+        """`size` zeroed counts wide enough for this board's dimensions"""
+        if self.width < 256 and self.height < 256:
+            return bytearray(size)
+        return array('H', bytes(2 * size))
+
+    def _reset_index(self):
+        self.column_heights = self._counters(self.width)
+        self.row_fill = self._counters(self.height)
+
+    def _rebuild_index(self):
+        """Recompute the whole index from the cells (after load_codes())"""
+        self._reset_index()
+        codes = self.codes()
+        width = self.width
+        for y in range(self.height):
+            self.row_fill[y] = width - codes[y * width:(y + 1) * width].count(0)
+        for x in range(width):
+            # Leading empty cells of the column, counted at C speed
+            self.column_heights[x] = len(codes[x::width].lstrip(b'\x00'))
+
+    @property
+    def holes(self):
+        return sum(self.column_heights) - sum(self.row_fill)
+
+    def _index_column(self, x, top=0):
+        """Recompute the height of one column, scanning down from row `top`
+
+        Callers pass the highest row the column's top can be on, so on tall
+        boards the scan skips the empty rows above the stack.
+        """
+        get = self.get
+        while top < self.height and get(x, top) is None:
+            top += 1
+        self.column_heights[x] = self.height - top
+
+    def _index_set(self, x, y, was_filled, filled):
+        """Account for a single cell changed by set_cell()"""
+        if was_filled != filled:
+            self.row_fill[y] += 1 if filled else -1
+            self._index_column(x, min(y, self.height - self.column_heights[x]))
+
+    def _index_place(self, cells):
+        """Account for newly filled (x, y) cells; returns the rows they completed"""
+        row_fill = self.row_fill
+        heights = self.column_heights
+        height = self.height
+        for x, y in cells:
+            row_fill[y] += 1
+            if height - y > heights[x]:
+                heights[x] = height - y
+
+        width = self.width
+        return sorted(y for y in {y for _, y in cells} if row_fill[y] == width)
+
+    def _index_clear(self, cleared):
+        """Account for removed rows (sorted, top first), after the cells moved"""
+        # Compact the row counts in one pass, like the cells
+        row_fill = self.row_fill
+        kept = self._counters(len(cleared))
+        start = 0
+        for y in cleared:
+            kept += row_fill[start:y]
+            start = y + 1
+        kept += row_fill[start:]
+        self.row_fill = kept
+
+        highest = cleared[0]
+        for x in range(self.width):
+            top = self.height - self.column_heights[x]
+            if top < highest:
+                # Top cell survives and only the full rows under it went away
+                self.column_heights[x] -= len(cleared)
+            elif top < self.height:
+                # Top was in a cleared row: cells only moved down, so the new
+                # top is at or below the old one
+                self._index_column(x, top)
+
+    def _index_garbage(self, count):
+        """Account for `count` rows pushed in from the bottom"""
+        count = min(count, self.height)
+        del self.row_fill[:count]
+        self.row_fill.extend([self.width - 1] * count)
+        for x in range(self.width):
+            # Every cell moved up `count` rows and the hole column may be the new top
+            self._index_column(x, max(0, self.height - self.column_heights[x] - count))
+
+    def full_rows(self):
+        """Rows that are completely filled, top first"""
+        width = self.width
+        return [y for y, fill in enumerate(self.row_fill) if fill == width]
+
+    def completed_rows(self, piece_type, rotation, x, y):
+        """Rows a piece placed at (x, y) would complete"""
+        counts = {}
+        for _, dy in ROTATIONS[piece_type][rotation & 3]:
+            counts[y + dy] = counts.get(y + dy, 0) + 1
+        width = self.width
+        return sorted(row for row, n in counts.items()
+                      if 0 <= row < self.height and self.row_fill[row] + n == width)
+
+    def drop_distance(self, piece_type, rotation, x, y):
+        """Rows a fitting piece at (x, y) falls before it lands
+
+        Read off the column heights when the piece is above the stack in
+        every column it covers; a piece tucked under an overhang falls back
+        to stepping down cell by cell.
+        """
+        heights = self.column_heights
+        limit = self.height - 1 - y
+        distance = limit
+        for dx, bottom in COLUMN_BOTTOMS[piece_type][rotation & 3]:
+            gap = limit - heights[x + dx] - bottom
+            if gap < distance:
+                distance = gap
+        if distance >= 0:
+            return distance
+
+        distance = 0
+        while self.fits(piece_type, rotation, x, y + distance + 1):
+            distance += 1
+        return distance
+
+
+class GridBoard(StackIndex):
+    """Reference board backend: a list of rows holding piece types (None = empty)"""
+
+    __slots__ = ('width', 'height', 'cells')
+
+    def __init__(self, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        self.width = width
+        self.height = height
+        self.clear()
+
+    def clear(self):
+        """Empty every cell"""
+        self.cells = [[None] * self.width for _ in range(self.height)]
+        self._reset_index()
+
+    def get(self, x, y):
+        """Piece type filling cell (x, y), or None"""
+        return self.cells[y][x]
+
+    def set_cell(self, x, y, piece_type):
+        """Fill (or with None, empty) a single cell"""
+        was_filled = self.cells[y][x] is not None
+        self.cells[y][x] = piece_type
+        self._index_set(x, y, was_filled, piece_type is not None)
+
+    def codes(self, top=0, bottom=None):
+        """Row-major bytes of cell codes (see PIECE_CODES), rows top..bottom-1"""
+        return bytes(PIECE_CODES[cell] for row in self.cells[top:bottom] for cell in row)
+
+    def load_codes(self, codes):
+        """Replace every cell from row-major codes, as returned by codes()"""
+        width = self.width
+        self.cells = [[CELL_TYPES[code - 1] if code else None for code in codes[y * width:(y + 1) * width]]
+                      for y in range(self.height)]
+        self._rebuild_index()
+
+    def fits(self, piece_type, rotation, x, y):
+        """Check whether a piece fits at (x, y) - cells above the board are allowed"""
+        piece_shape = PIECES[piece_type][rotation % len(PIECES[piece_type])]
+
+        for dx, dy in piece_shape:
+            new_x = x + dx
+            new_y = y + dy
+
+            # Check bounds
+            if new_x < 0 or new_x >= self.width or new_y >= self.height:
+                return False
+
+            # Check collision (allow pieces above board)
+            if new_y >= 0 and self.cells[new_y][new_x] is not None:
+                return False
+
+        return True
+
+    def place(self, piece_type, rotation, x, y):
+        """Write a piece into the board (cells above the board are dropped)
+
+        Returns the rows this placement completed, top first.
+        """
+        piece_shape = PIECES[piece_type][rotation % len(PIECES[piece_type])]
+
+        placed = []
+        for dx, dy in piece_shape:
+            new_x = x + dx
+            new_y = y + dy
+            if 0 <= new_y < self.height and 0 <= new_x < self.width:
+                self.cells[new_y][new_x] = piece_type
+                placed.append((new_x, new_y))
+        return self._index_place(placed)
+
+    def clear_full_rows(self, rows=None):
+        """Remove completed rows in one compaction pass and return the count
+
+        `rows` limits the check to the rows a placement completed (see
+        place()); by default the row fill counts are consulted.
+        """
+        cleared = self.full_rows() if rows is None else sorted(
+            y for y in rows if self.row_fill[y] == self.width)
+        if not cleared:
+            return 0
+
+        # Surviving rows move down as whole lists; nothing is copied cell by cell
+        cells = self.cells
+        kept = [[None] * self.width for _ in cleared]
+        start = 0
+        for y in cleared:
+            kept += cells[start:y]
+            start = y + 1
+        kept += cells[start:]
+        self.cells = kept
+        self._index_clear(cleared)
+        return len(cleared)
+
+    def insert_garbage(self, count, hole):
+        """Push `count` garbage rows, full but for column `hole`, in from the bottom
+
+        Returns True when filled cells were pushed off the top, or when
+        there is more garbage than the board is tall.
+        """
+        overflow = count > self.height
+        count = min(count, self.height)
+        overflow = overflow or any(cell is not None for row in self.cells[:count] for cell in row)
+        del self.cells[:count]
+        for _ in range(count):
+            self.cells.append([None if x == hole else GARBAGE for x in range(self.width)])
+        self._index_garbage(count)
+        return overflow
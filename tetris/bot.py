@@ -0,0 +1,155 @@
+from functools import lru_cache
+from tetris.bitboard import BitBoard, CEILING, MASK_PADDING
+from tetris.engine import (ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE,
+                           ACTION_RESTART, ACTION_NOOP)
+from tetris.pieces import PIECES
+
+# Heuristic weights (aggregate height, cleared lines, holes, bumpiness)
+DEFAULT_WEIGHTS = {
+    'height': -0.510066,
+    'lines': 0.760666,
+    'holes': -0.35663,
+    'bumpiness': -0.184483,
+}
+
+
+def _popcount(value):
+    return bin(value).count('1')
+
+
+class AutoPlayer:
+    """Built-in AI player
+
+    Enumerates every final placement the current piece can reach by rotating
+    at its current height, sliding sideways and dropping, scores each
+    resulting board with a weighted heuristic and caches board scores in an
+    LRU table keyed by the board's row bitmasks.
+    """
+
+    def __init__(self, weights=None, cache_size=1 << 16):
+        self.weights = dict(DEFAULT_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+        self.board_score = lru_cache(maxsize=cache_size)(self._score_rows)
+
+        # Controller state: plan for the piece currently falling
+        self.planned_piece = None
+        self.target = None
+
+    def _bitboard(self, board):
+        """The board as a BitBoard (engines on the grid backend get converted)"""
+        if isinstance(board, BitBoard):
+            return board
+        bitboard = BitBoard(board.width, board.height)
+        bitboard.load_codes(board.codes())
+        return bitboard
+
+    def placements(self, board, piece_type, x, y, rotation):
+        """Reachable (rotation, x, landing_y) placements of a piece at (x, y)"""
+        bitboard = self._bitboard(board)
+        fits = bitboard.fits
+        drop_distance = bitboard.drop_distance
+        results = []
+
+        rotation_count = len(PIECES[piece_type])
+        for turns in range(rotation_count):
+            r = (rotation + turns) % rotation_count
+            # Rotating stops at the first blocked rotation, like rotate_piece()
+            if not fits(piece_type, r, x, y):
+                break
+
+            for step in (-1, 1):
+                column = x if step == -1 else x + 1
+                while fits(piece_type, r, column, y):
+                    # Landing rows come off the column heights, not a cell-by-cell drop
+                    results.append((r, column, y + drop_distance(piece_type, r, column, y)))
+                    column += step
+        return results
+
+    def _score_rows(self, rows, width):
+        """Heuristic value of a board given as a tuple of row bitmasks (top first)"""
+        height = len(rows)
+        heights = {}
+        holes = 0
+        seen = 0
+        for y, row in enumerate(rows):
+            # Empty cells under anything already seen above are holes
+            holes += _popcount(seen & ~row)
+            new = row & ~seen
+            while new:
+                bit = new & -new
+                heights[bit.bit_length() - 1] = height - y
+                new ^= bit
+            seen |= row
+
+        columns = [heights.get(x, 0) for x in range(width)]
+        bumpiness = sum(abs(a - b) for a, b in zip(columns, columns[1:]))
+        w = self.weights
+        return w['height'] * sum(columns) + w['holes'] * holes + w['bumpiness'] * bumpiness
+
+    def evaluate(self, bitboard, piece_type, rotation, x, landing_y):
+        """Score the board that results from locking a piece
+
+        Empty rows above both the stack and the piece score nothing, so only
+        the rows from there down are copied and scored - on tall boards that
+        is the stack, not the whole board.
+        """
+        _, _, groups = bitboard.masks[piece_type][rotation & 3][x + MASK_PADDING]
+        top = min(bitboard.height - max(bitboard.column_heights), landing_y + groups[0][0] - CEILING)
+        if top < 0:
+            return float('-inf')  # Locks out above the board
+        rows = bitboard.rows[CEILING + top:]
+        for row, mask, _ in groups:
+            rows[landing_y + row - CEILING - top] |= mask
+
+        full = bitboard.full_row
+        lines = rows.count(full)
+        if lines:
+            rows = [0] * lines + [row for row in rows if row != full]
+        return self.weights['lines'] * lines + self.board_score(tuple(rows), bitboard.width)
+
+    def best_placement(self, engine):
+        """Best reachable (rotation, x, landing_y) for the engine's current piece"""
+        bitboard = self._bitboard(engine.board)
+        best = None
+        best_score = float('-inf')
+        for rotation, x, landing_y in self.placements(
+                bitboard, engine.current_type, engine.current_x, engine.current_y, engine.current_rotation):
+            score = self.evaluate(bitboard, engine.current_type, rotation, x, landing_y)
+            if best is None or score > best_score:
+                best = (rotation, x, landing_y)
+                best_score = score
+        return best
+
+    def play_piece(self, engine):
+        """Headless: lock the current piece at its best placement immediately"""
+        best = self.best_placement(engine)
+        if best is None:
+            # Nothing fits (only possible at top-out): let it lock where it is
+            engine.place_piece()
+            return
+        engine.current_rotation, engine.current_x, engine.current_y = best
+        engine.place_piece()
+
+    def next_action(self, engine):
+        """Keyboard-free controller: one ACTION_* per tick towards the plan"""
+        if engine.game_over:
+            self.planned_piece = None
+            return ACTION_RESTART
+        if engine.paused:
+            return ACTION_NOOP
+
+        if self.planned_piece != engine.pieces_placed:
+            self.planned_piece = engine.pieces_placed
+            self.target = self.best_placement(engine)
+        if self.target is None:
+            return ACTION_DOWN
+
+        rotation, x, _ = self.target
+        if engine.current_rotation != rotation:
+            return ACTION_ROTATE
+        if engine.current_x < x:
+            return ACTION_RIGHT
+        if engine.current_x > x:
+            return ACTION_LEFT
+        return ACTION_DOWN
@@ -0,0 +1,19 @@
+import argparse
+
+# argparse types shared by the command-line entry points
+
+
+def positive_int(text):
+    """argparse type: a whole number of at least 1"""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def non_negative_int(text):
+    """argparse type: a whole number of at least 0"""
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, got {value}")
+    return value
@@ -21,10 +21,18 @@ BOARD_WIDTH = 10          # Standard Tetris width
 BOARD_HEIGHT = 20         # Standard Tetris height
 BLOCK_SIZE = 25           # Size of each block in pixels
 
-# Game board position on screen
-BOARD_X = 250
+# Logical screen: everything is drawn at this size, then scaled to the window
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+
+# Game board position on the logical screen
+BOARD_X = 300
 BOARD_Y = 50
 
+# UI columns on the logical screen
+PANEL_X = 50              # Score, lines and level
+CONTROLS_X = 600          # Controls help
+
 # Game timing
 INITIAL_FALL_SPEED = 1.0  # Seconds between automatic drops
 FAST_DROP_SPEED = 0.05    # Speed when soft dropping
@@ -0,0 +1,131 @@
+from fractions import Fraction
+import pygame
+
+# How the logical screen is stretched to the window:
+#   scaled  - pygame.SCALED: SDL scales on the GPU in one pass per frame
+#   integer - largest whole-number multiple that fits, letterboxed; every
+#             logical pixel becomes an exact k x k block
+#   fit     - largest scale that keeps the aspect ratio, letterboxed
+SCALE_MODES = ('scaled', 'integer', 'fit')
+
+
+def parse_size(text):
+    """'1920x1080' -> (1920, 1080), for argparse"""
+    width, _, height = text.lower().partition('x')
+    return int(width), int(height)
+
+
+class Display:
+    """Window presenting a fixed-size logical surface at any window size
+
+    Games draw into `surface` at the logical size and hand the rects they
+    changed to present(). In 'scaled' mode the surface is pygame's own
+    SCALED display. In the software modes it is an off-screen surface and
+    present() scales only the dirty rects into a cached letterboxed target
+    on the window, so a 4K window costs the pixels that changed, not a
+    redraw of bigger shapes. Dirty rects are first grown to whole blocks of
+    the scale grid, so a pixel comes out the same whichever rect redraws it.
+    """
+
+    def __init__(self, logical_size, window_size=None, fullscreen=False, mode='scaled', vsync=False):
+        if mode not in SCALE_MODES:
+            raise ValueError(f"unknown scale mode {mode!r}, expected one of {', '.join(SCALE_MODES)}")
+        if vsync and mode != 'scaled':
+            # SDL only syncs through its renderer, which SCALED provides
+            raise ValueError("vsync needs the 'scaled' mode")
+        self.logical_size = logical_size
+        self.mode = mode
+        self.vsync = vsync
+        # Set by invalidate(): the next present() pushes the whole window
+        self.needs_full_update = False
+        flags = pygame.FULLSCREEN if fullscreen else 0
+
+        if mode == 'scaled':
+            # SDL picks the window size (a whole multiple of the logical size
+            # when windowed) unless fullscreen stretches it to the desktop
+            self.window = pygame.display.set_mode(logical_size, flags | pygame.SCALED,
+                                                  vsync=1 if vsync else 0)
+            self.surface = self.window
+            self.scale = None
+            self.target = None
+            return
+
+        if window_size is None:
+            window_size = (0, 0) if fullscreen else logical_size  # (0, 0): desktop size
+        self.window = pygame.display.set_mode(window_size, flags)
+        self.surface = pygame.Surface(logical_size).convert()
+
+        window_width, window_height = self.window.get_size()
+        width, height = logical_size
+        scale = min(window_width / width, window_height / height)
+        if mode == 'integer':
+            scale = max(1, int(scale))
+        self.scale = scale
+        # Letterboxed area of the window the logical screen is scaled into
+        target = pygame.Rect(0, 0, round(width * scale), round(height * scale))
+        target.center = self.window.get_rect().center
+        self.target = target
+        # Logical pixels per block of the scale grid: `step` logical pixels
+        # scale to a whole number of window pixels (1 in integer mode; 25 for
+        # 1.28x), so blocks can be scaled one at a time without seams
+        self.step = (Fraction(target.width, width).denominator,
+                     Fraction(target.height, height).denominator)
+        self.window.fill((0, 0, 0))
+
+    def _aligned(self, rect):
+        """A logical rect grown to whole blocks of the scale grid"""
+        step_x, step_y = self.step
+        width, height = self.logical_size
+        left = rect.left - rect.left % step_x
+        top = rect.top - rect.top % step_y
+        right = min(width, -(-rect.right // step_x) * step_x)
+        bottom = min(height, -(-rect.bottom // step_y) * step_y)
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def _window_rect(self, rect):
+        """Window pixels covered by a grid-aligned logical rect"""
+        width, height = self.logical_size
+        target = self.target
+        left = rect.left * target.width // width
+        top = rect.top * target.height // height
+        right = rect.right * target.width // width
+        bottom = rect.bottom * target.height // height
+        return pygame.Rect(target.left + left, target.top + top, right - left, bottom - top)
+
+    def invalidate(self):
+        """Push the whole window on the next present(), letterbox included
+
+        For when the window was uncovered or restored and the system dropped
+        its pixels; pair it with the renderer's invalidate().
+        """
+        self.needs_full_update = True
+
+    def present(self, dirty):
+        """Show a frame; `dirty` lists the logical rects that changed"""
+        full, self.needs_full_update = self.needs_full_update, False
+        if self.target is None:
+            if self.vsync or full:
+                pygame.display.flip()  # Blocks until the next refresh with vsync
+            else:
+                pygame.display.update(dirty)
+            return
+
+        if not dirty and not full:
+            return
+        bounds = self.surface.get_rect()
+        updated = []
+        for rect in dirty:
+            rect = pygame.Rect(rect).clip(bounds)
+            if not rect:
+                continue
+            rect = self._aligned(rect)
+            window_rect = self._window_rect(rect)
+            # Nearest-neighbour scale straight into the window: no
+            # intermediate full-size surface, no smoothing blur
+            pygame.transform.scale(self.surface.subsurface(rect), window_rect.size,
+                                   self.window.subsurface(window_rect))
+            updated.append(window_rect)
+        if full:
+            pygame.display.flip()
+        else:
+            pygame.display.update(updated)
@@ -0,0 +1,296 @@
+import random
+import struct
+from tetris.board import GridBoard, pack_codes, unpack_codes
+from tetris.constants import BOARD_WIDTH, BOARD_HEIGHT
+from tetris.pieces import PIECES, PIECE_TYPES
+from tetris.randomizer import PieceRandomizer
+
+# Abstract actions understood by the engine (frontends map keys onto these)
+ACTION_LEFT = 0
+ACTION_RIGHT = 1
+ACTION_DOWN = 2
+ACTION_ROTATE = 3
+ACTION_PAUSE = 4
+ACTION_RESTART = 5
+ACTION_NOOP = 6  # No input this tick
+ACTION_HARD_DROP = 7
+
+# Original Nintendo scoring
+LINE_SCORES = [0, 40, 100, 300, 1200]
+HARD_DROP_SCORE = 2  # Per row, on top of the soft drop's 1
+
+# The simulation advances in whole ticks so games replay bit-exactly;
+# one tick is one NES (NTSC) video frame
+TICK_RATE = 60.0988
+TICK_SECONDS = 1.0 / TICK_RATE
+
+# NES frames per row by level; levels past the end keep the last entry
+NES_FRAMES_PER_ROW = [48, 43, 38, 33, 28, 23, 18, 13, 8, 6,
+                      5, 5, 5, 4, 4, 4, 3, 3, 3] + [2] * 10 + [1]
+
+# Gravity per level as (rows, ticks): `rows` rows fall every `ticks` ticks,
+# so tables faster than one row per tick (e.g. [(20, 1)]) work too
+GRAVITY_TABLE = [(1, frames) for frames in NES_FRAMES_PER_ROW]
+
+# snapshot() layout (little-endian): seed, randomizer state, frame, score,
+# pieces placed, lines, level, piece code (0 = none), x, y, rotation,
+# fall_time and flags, then the board's cell codes packed two per byte
+# (x and y are 16-bit so stress boards hundreds of cells wide fit)
+SNAPSHOT_HEADER = struct.Struct('<IIIIIHHBhhBHB')
+SNAPSHOT_GAME_OVER = 1
+SNAPSHOT_PAUSED = 2
+
+# Bump whenever a rule change would make old replays diverge
+RULES_VERSION = 2
+
+
+def gravity_for_level(level, table=GRAVITY_TABLE):
+    """(rows, ticks) gravity step for a level"""
+    return table[min(level, len(table) - 1)]
+
+
+class TetrisEngine:
+    """Headless Tetris rules: board, pieces, scoring - no pygame required
+
+    Slotted, with the piece and gravity tables shared at class level: an
+    idle game takes about 0.9 KB on a BitBoard (3.4 KB on the reference
+    GridBoard), so one process can hold tens of thousands.
+    """
+
+    __slots__ = ('listener', 'board_version', 'seed', 'randomizer', 'frame',
+                 'board', 'current_piece', 'current_x', 'current_y', 'current_rotation',
+                 'current_type', 'score', 'lines', 'level', 'pieces_placed', 'fall_time',
+                 'gravity', 'game_over', 'paused')
+
+    pieces = PIECES
+    gravity_table = GRAVITY_TABLE
+
+    def __init__(self, board_class=GridBoard, listener=None, seed=None,
+                 width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        # Board backend: GridBoard (reference) or BitBoard (fast bitmasks), at
+        # any size - reset() empties it in place rather than building another
+        self.board = board_class(width, height)
+        # Called with event names ('line_clear', 'game_over', ...) - None when headless
+        self.listener = listener
+        # Bumped whenever locked cells change so renderers can cache the board
+        self.board_version = 0
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Start a fresh game - the same seed and inputs replay the same game"""
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed & 0xFFFFFFFF
+        self.randomizer = PieceRandomizer(self.seed)
+        self.frame = 0
+
+        self.board.clear()
+        self.board_version += 1
+
+        # Game state
+        self.current_piece = None
+        self.current_x = 0
+        self.current_y = 0
+        self.current_rotation = 0
+        self.current_type = None
+
+        # Classic scoring (original Nintendo scoring)
+        self.score = 0
+        self.lines = 0
+        self.level = 0
+        self.pieces_placed = 0
+
+        # Gravity: fall_time gains `rows` per tick and a row falls per `ticks`
+        self.fall_time = 0
+        self.gravity = gravity_for_level(self.level, self.gravity_table)
+
+        self.game_over = False
+        self.paused = False
+
+        self.spawn_piece()
+
+    @property
+    def fall_speed(self):
+        """Seconds per row at the current level"""
+        rows, ticks = self.gravity
+        return ticks / rows * TICK_SECONDS
+
+    def _emit(self, event):
+        """Report a side effect (sound cue, state change) to the frontend"""
+        if self.listener is not None:
+            self.listener(event)
+
+    def spawn_piece(self):
+        """Spawn a new random piece"""
+        self.current_type = self.randomizer.next_piece()
+        self.current_piece = self.current_type
+        self.current_x = self.board.width // 2 - 1  # 4 on the standard 0-9 board
+        self.current_y = 0
+        self.current_rotation = 0
+
+        # Check game over
+        if not self.is_valid_position():
+            self.game_over = True
+            self._emit('game_over')
+
+    def is_valid_position(self, test_x=None, test_y=None, test_rotation=None):
+        """Check if current piece position is valid"""
+        x = test_x if test_x is not None else self.current_x
+        y = test_y if test_y is not None else self.current_y
+        rotation = test_rotation if test_rotation is not None else self.current_rotation
+
+        return self.board.fits(self.current_type, rotation, x, y)
+
+    def drop_distance(self):
+        """Rows the current piece can still fall (the ghost piece sits this far down)"""
+        return self.board.drop_distance(self.current_type, self.current_rotation,
+                                        self.current_x, self.current_y)
+
+    def hard_drop(self):
+        """Drop the current piece straight to its landing row and lock it"""
+        distance = self.drop_distance()
+        self.current_y += distance
+        self.score += HARD_DROP_SCORE * distance
+        self.place_piece()
+
+    def place_piece(self):
+        """Place current piece on board"""
+        completed = self.board.place(self.current_type, self.current_rotation,
+                                     self.current_x, self.current_y)
+        self.pieces_placed += 1
+        self._emit('drop')
+
+        # Clear lines - only the rows this piece completed need checking
+        self.clear_lines(completed)
+        self.board_version += 1
+
+        # Spawn next piece
+        self.spawn_piece()
+
+    def clear_lines(self, rows=None):
+        """Clear completed lines (classic Tetris line clearing)"""
+        lines_cleared = self.board.clear_full_rows(rows)
+
+        # Classic scoring
+        if lines_cleared > 0:
+            self._emit('tetris' if lines_cleared == 4 else 'line_clear')
+            self.score += LINE_SCORES[lines_cleared] * (self.level + 1)
+            self.lines += lines_cleared
+
+            # Level up every 10 lines (classic)
+            new_level = self.lines // 10
+            if new_level > self.level:
+                self.level = new_level
+                # NES speed curve (gets very fast)
+                self.gravity = gravity_for_level(self.level, self.gravity_table)
+
+        return lines_cleared
+
+    def receive_garbage(self, count, hole):
+        """Versus mode: push `count` garbage rows (open at column `hole`) under the stack"""
+        if self.game_over or count <= 0:
+            return
+        overflow = self.board.insert_garbage(count, hole)
+        self.board_version += 1
+
+        # The falling piece rides up with the stack if it has to
+        lifted = 0
+        while not self.is_valid_position() and lifted < count:
+            self.current_y -= 1
+            lifted += 1
+        if overflow or not self.is_valid_position():
+            self.game_over = True
+            self._emit('game_over')
+
+    def snapshot(self):
+        """The whole game as fixed-size bytes (see restore())"""
+        return self.snapshot_state() + self.snapshot_board()
+
+    def snapshot_state(self):
+        """The snapshot header alone: everything but the board (see restore_state())"""
+        flags = (SNAPSHOT_GAME_OVER if self.game_over else 0) | (SNAPSHOT_PAUSED if self.paused else 0)
+        piece = PIECE_TYPES.index(self.current_type) + 1 if self.current_type else 0
+        return SNAPSHOT_HEADER.pack(
+            self.seed, self.randomizer.getstate(), self.frame, self.score, self.pieces_placed,
+            self.lines, self.level, piece, self.current_x, self.current_y, self.current_rotation,
+            self.fall_time, flags)
+
+    def snapshot_board(self):
+        """The snapshot's board part: cell codes packed two per byte"""
+        return pack_codes(self.board.codes())
+
+    def restore(self, data):
+        """Return to a snapshot() taken on a board of the same size; emits no events"""
+        self.restore_state(data)
+        board = self.board
+        board.load_codes(unpack_codes(data[SNAPSHOT_HEADER.size:], board.width * board.height))
+        self.board_version += 1
+
+    def restore_state(self, data):
+        """Restore a snapshot's header only, leaving the board as it is"""
+        (seed, randomizer_state, self.frame, self.score, self.pieces_placed, self.lines,
+         self.level, piece, self.current_x, self.current_y, self.current_rotation,
+         self.fall_time, flags) = SNAPSHOT_HEADER.unpack_from(data)
+        self.seed = seed
+        self.randomizer.setstate(randomizer_state)
+        self.current_type = self.current_piece = PIECE_TYPES[piece - 1] if piece else None
+        self.gravity = gravity_for_level(self.level, self.gravity_table)
+        self.game_over = bool(flags & SNAPSHOT_GAME_OVER)
+        self.paused = bool(flags & SNAPSHOT_PAUSED)
+
+    def move_piece(self, dx, dy):
+        """Try to move piece"""
+        if self.is_valid_position(self.current_x + dx, self.current_y + dy):
+            self.current_x += dx
+            self.current_y += dy
+            return True
+        return False
+
+    def rotate_piece(self):
+        """Try to rotate piece"""
+        new_rotation = (self.current_rotation + 1) % len(self.pieces[self.current_type])
+        if self.is_valid_position(test_rotation=new_rotation):
+            self.current_rotation = new_rotation
+            self._emit('rotate')
+            return True
+        return False
+
+    def apply(self, action):
+        """Apply one abstract action (ACTION_*) to the game"""
+        if self.game_over:
+            if action == ACTION_RESTART:
+                self.reset()
+                self._emit('restart')
+            return
+
+        if action == ACTION_PAUSE:
+            self.paused = not self.paused
+            self._emit('pause' if self.paused else 'resume')
+        elif not self.paused:
+            if action == ACTION_LEFT:
+                self.move_piece(-1, 0)
+            elif action == ACTION_RIGHT:
+                self.move_piece(1, 0)
+            elif action == ACTION_DOWN:
+                if self.move_piece(0, 1):
+                    self.score += 1  # Soft drop bonus
+            elif action == ACTION_ROTATE:
+                self.rotate_piece()
+            elif action == ACTION_HARD_DROP:
+                self.hard_drop()
+
+    def tick(self):
+        """Advance the game by one TICK_SECONDS step"""
+        self.frame += 1
+        if self.game_over or self.paused:
+            return
+
+        # Leftover time carries over, and fast gravity can drop several rows
+        rows, ticks = self.gravity
+        self.fall_time += rows
+        while self.fall_time >= ticks:
+            self.fall_time -= ticks
+            if not self.move_piece(0, 1):
+                self.fall_time = 0
+                self.place_piece()
+                break
@@ -0,0 +1,156 @@
+import time
+from collections import deque
+import pygame
+from tetris.engine import (ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE,
+                           ACTION_PAUSE, ACTION_RESTART, ACTION_HARD_DROP)
+from tetris.constants import BOARD_WIDTH
+from tetris.timing import LatencyHistogram
+
+# Keyboard mapping onto engine actions
+KEY_ACTIONS = {
+    pygame.K_LEFT: ACTION_LEFT,
+    pygame.K_RIGHT: ACTION_RIGHT,
+    pygame.K_DOWN: ACTION_DOWN,
+    pygame.K_UP: ACTION_ROTATE,
+    pygame.K_SPACE: ACTION_HARD_DROP,
+    pygame.K_p: ACTION_PAUSE,
+    pygame.K_r: ACTION_RESTART,
+}
+
+# NES NTSC auto-shift, in ticks: sideways repeats after 16 frames held, then
+# every 6; soft drop repeats every 2 frames from the first press
+DEFAULT_DAS = 16
+DEFAULT_ARR = 6
+DEFAULT_DOWN_RATE = 2
+
+
+class AutoRepeat:
+    """Delayed auto shift for one held action: fires on press, again after
+    `delay` ticks, then every `rate` ticks while held
+
+    A `rate` of 0 is instant auto-repeat: once the delay is up, every tick
+    repeats `burst` times, enough to carry a piece to the wall.
+    """
+
+    __slots__ = ('delay', 'rate', 'burst', 'held', 'count')
+
+    def __init__(self, delay, rate, burst=1):
+        if delay < 0 or rate < 0:
+            raise ValueError(f"delay and rate must not be negative, got {delay} and {rate}")
+        self.delay = delay
+        self.rate = rate
+        self.burst = burst
+        self.held = False
+        self.count = 0
+
+    def press(self):
+        self.held = True
+        self.count = 0
+
+    def release(self):
+        self.held = False
+
+    def tick(self):
+        """Advance one tick while held; the number of repeats due"""
+        self.count += 1
+        if self.count < self.delay:
+            return 0
+        if self.rate == 0:
+            return self.burst
+        return 1 if (self.count - self.delay) % self.rate == 0 else 0
+
+
+class KeyboardInput:
+    """Timestamped key events turned into per-tick engine actions
+
+    Key events are queued with the time they were read and drained at the
+    start of each simulation tick, so input is handled at tick granularity
+    no matter when frames are drawn. Held left/right/down keys auto-repeat
+    (DAS/ARR); of left and right, only the most recent press repeats. An
+    `arr` of 0 shifts all the way, up to `wall` columns, on every repeat tick.
+
+    state_latency times each input from being read to the tick that applied
+    it, for inputs that changed the game; display_latency extends that to
+    the frame that showed the change (see presented()).
+    """
+
+    def __init__(self, das=DEFAULT_DAS, arr=DEFAULT_ARR, down_rate=DEFAULT_DOWN_RATE,
+                 key_actions=KEY_ACTIONS, wall=BOARD_WIDTH):
+        self.key_actions = key_actions
+        self.repeaters = {
+            ACTION_LEFT: AutoRepeat(das, arr, wall),
+            ACTION_RIGHT: AutoRepeat(das, arr, wall),
+            ACTION_DOWN: AutoRepeat(0, down_rate),
+        }
+        self.queue = deque()
+
+        self.state_latency = LatencyHistogram()
+        self.display_latency = LatencyHistogram()
+        self.unpresented = []
+
+    def push(self, event, timestamp=None):
+        """Queue a pygame event; timestamp defaults to now (perf_counter)"""
+        if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+            action = self.key_actions.get(event.key)
+            if action is not None:
+                if timestamp is None:
+                    timestamp = time.perf_counter()
+                self.queue.append((event.type == pygame.KEYDOWN, action, timestamp))
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            # Key-up events never arrive while unfocused
+            self.queue.append((False, None, None))
+
+    def tick_actions(self):
+        """Actions for the coming tick as (action, timestamp) pairs
+
+        Presses carry their read time; auto-repeats carry None.
+        """
+        actions = []
+        pressed_now = set()
+        queue = self.queue
+        while queue:
+            pressed, action, timestamp = queue.popleft()
+            if action is None:
+                for repeater in self.repeaters.values():
+                    repeater.release()
+                continue
+
+            repeater = self.repeaters.get(action)
+            if not pressed:
+                if repeater is not None:
+                    repeater.release()
+                continue
+            if repeater is not None:
+                repeater.press()
+                pressed_now.add(action)
+                if action == ACTION_LEFT:
+                    self.repeaters[ACTION_RIGHT].release()
+                elif action == ACTION_RIGHT:
+                    self.repeaters[ACTION_LEFT].release()
+            actions.append((action, timestamp))
+
+        # Held keys count from the tick after their press
+        for action, repeater in self.repeaters.items():
+            if repeater.held and action not in pressed_now:
+                actions.extend([(action, None)] * repeater.tick())
+        return actions
+
+    def applied(self, timestamp, now=None):
+        """Record that an input read at `timestamp` just changed the game"""
+        if now is None:
+            now = time.perf_counter()
+        self.state_latency.record(1000.0 * (now - timestamp))
+        self.unpresented.append(timestamp)
+
+    def presented(self, now=None):
+        """Call after the display update that showed this frame's changes"""
+        if not self.unpresented:
+            return
+        if now is None:
+            now = time.perf_counter()
+        for timestamp in self.unpresented:
+            self.display_latency.record(1000.0 * (now - timestamp))
+        self.unpresented.clear()
+
+    def histograms(self):
+        return {'input_to_state': self.state_latency, 'input_to_display': self.display_latency}
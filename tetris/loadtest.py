@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import random
+import sys
+import time
+from tetris.engine import ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE, TICK_SECONDS
+from tetris.server import (ACTION, DEFAULT_PORT, MATCH_BODY, MSG_END, MSG_MATCH, MSG_STATE,
+                           STATE_BODY, read_frame)
+from tetris.timing import LatencyHistogram
+
+LOAD_ACTIONS = [ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE]
+
+
+class LoadStats:
+    """Latency samples shared by every session (milliseconds)
+
+    tick_delay: how far behind the ideal tick schedule each STATE frame
+    arrived, relative to the earliest frame of its match (so it measures
+    jitter and queueing, not clock offset).
+    input_rtt: time from sending an action to receiving a STATE frame that
+    acknowledges it.
+    """
+
+    def __init__(self):
+        self.tick_delay = LatencyHistogram(bin_ms=0.1, max_ms=1000.0)
+        self.input_rtt = LatencyHistogram(bin_ms=0.1, max_ms=1000.0)
+        self.matches = 0
+        self.frames = 0
+        self.actions = 0
+
+
+async def run_session(host, port, stats, deadline, actions_per_second, rng):
+    """Play matches back to back with random inputs until the deadline"""
+    while time.perf_counter() < deadline:
+        reader, writer = await asyncio.open_connection(host, port)
+        sent = {}  # seq -> send time
+        seq = 0
+        me = None
+        origin = None  # (arrival time - tick time) of the earliest frame so far
+
+        async def send_inputs():
+            nonlocal seq
+            while True:
+                await asyncio.sleep(rng.expovariate(actions_per_second))
+                seq = (seq + 1) & 0xFFFF
+                sent[seq] = time.perf_counter()
+                writer.write(ACTION.pack(rng.choice(LOAD_ACTIONS), seq))
+                stats.actions += 1
+
+        sender = None
+        try:
+            while time.perf_counter() < deadline:
+                remaining = deadline - time.perf_counter()
+                message_type, body = await asyncio.wait_for(read_frame(reader), max(remaining, 0.001))
+                now = time.perf_counter()
+                if message_type == MSG_MATCH:
+                    _, me = MATCH_BODY.unpack(body)
+                    stats.matches += 1
+                    sender = asyncio.ensure_future(send_inputs())
+                elif message_type == MSG_STATE:
+                    stats.frames += 1
+                    player, tick, ack = STATE_BODY.unpack_from(body)[:3]
+                    offset = now - tick * TICK_SECONDS
+                    if origin is None or offset < origin:
+                        origin = offset
+                    stats.tick_delay.record(1000.0 * (offset - origin))
+                    if player == me and ack in sent:
+                        stats.input_rtt.record(1000.0 * (now - sent.pop(ack)))
+                        # Older unacknowledged inputs were applied on the same tick
+                        for old in [s for s in sent if s < ack]:
+                            del sent[old]
+                elif message_type == MSG_END:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            if sender is not None:
+                sender.cancel()
+            writer.close()
+
+
+async def run_load(host, port, sessions, duration, actions_per_second, seed):
+    stats = LoadStats()
+    deadline = time.perf_counter() + duration
+    rng = random.Random(seed)
+    await asyncio.gather(*[
+        run_session(host, port, stats, deadline, actions_per_second, random.Random(rng.getrandbits(32)))
+        for _ in range(sessions)
+    ])
+    return stats
+
+
+def print_report(stats, sessions, duration):
+    print(f"{sessions} sessions for {duration:.0f}s: {stats.matches} matches, "
+          f"{stats.frames} state frames, {stats.actions} actions")
+    print(f"{'latency':<12} {'count':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, histogram in (('tick delay', stats.tick_delay), ('input rtt', stats.input_rtt)):
+        summary = histogram.summary()
+        if not summary['count']:
+            print(f"{name:<12} {0:>8}")
+            continue
+        print(f"{name:<12} {summary['count']:>8} {summary['p50_ms']:>8.1f} {summary['p95_ms']:>8.1f} "
+              f"{summary['p99_ms']:>8.1f} {summary['max_ms']:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test a Retro Tetris versus server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--sessions', type=int, default=200, help="concurrent clients (default: %(default)s)")
+    parser.add_argument('--duration', type=float, default=30.0, help="seconds to run (default: %(default)s)")
+    parser.add_argument('--actions-per-second', type=float, default=4.0,
+                        help="average inputs per client per second (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    stats = asyncio.run(run_load(args.host, args.port, args.sessions, args.duration,
+                                 args.actions_per_second, args.seed))
+    print_report(stats, args.sessions, args.duration)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+# Parent of every module logger in the package (logging.getLogger(__name__))
+LOGGER_NAME = 'tetris'
+DEFAULT_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+# Records waiting for the writer; past this they are dropped, not waited on
+DEFAULT_QUEUE_SIZE = 1024
+# Per message template: a burst of this many, then this many per second
+DEFAULT_BURST = 10
+DEFAULT_RATE = 1.0
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per (logger, message template)
+
+    Each template may log `burst` records at once and `rate` per second on
+    average; the rest are dropped. The next record that gets through says
+    how many were suppressed. Templates are the unformatted msg, so log
+    with %-style arguments rather than f-strings.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}  # key -> [tokens, last refill, suppressed]
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = [self.burst, now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar suppressed)"
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: a full queue drops the record
+
+    Formatting happens here on the calling thread; the I/O happens on the
+    listener's thread.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+_handler = None
+
+
+def configure(level='INFO', stream=None, path=None, queue_size=DEFAULT_QUEUE_SIZE,
+              rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+    """Route the package's logging through a queue to a background writer
+
+    Logging calls on the game thread then only format and enqueue; writing
+    to `stream` (default stdout) and `path` happens on the writer thread.
+    Calling it again replaces the previous setup.
+    """
+    global _listener, _handler
+    shutdown()
+
+    targets = [logging.StreamHandler(sys.stdout if stream is None else stream)]
+    if path is not None:
+        targets.append(logging.FileHandler(path, encoding='utf-8'))
+    formatter = logging.Formatter(DEFAULT_FORMAT)
+    for target in targets:
+        target.setFormatter(formatter)
+
+    _handler = DroppingQueueHandler(queue.Queue(queue_size))
+    _handler.addFilter(RateLimitFilter(rate, burst))
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    logger.addHandler(_handler)
+    # Never also reach the root logger's (blocking) handlers
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(_handler.queue, *targets)
+    _listener.start()
+    atexit.register(shutdown)
+    return logger
+
+
+def shutdown():
+    """Write out everything queued and stop the writer thread"""
+    global _listener, _handler
+    if _listener is None:
+        return
+    logger = logging.getLogger(LOGGER_NAME)
+    if _handler.dropped:
+        # The queue may be full again; skip the queue and the rate limit
+        _listener.handle(logger.makeRecord(
+            LOGGER_NAME, logging.WARNING, __file__, 0,
+            "%d log records dropped with the queue full", (_handler.dropped,), None))
+    logger.removeHandler(_handler)
+    _listener.stop()
+    for target in _listener.handlers:
+        target.close()
+    _listener = _handler = None
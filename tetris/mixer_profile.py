@@ -0,0 +1,154 @@
+import argparse
+import statistics
+import time
+import pygame
+
+# Effect channels plus the dedicated music channel
+MIXER_CHANNELS = 8
+
+
+class MixerProfile:
+    """Mixer output settings: sample rate, sample size, channel count and buffer frames"""
+
+    def __init__(self, name, frequency, buffer, size=-16, channels=2):
+        self.name = name
+        self.frequency = frequency
+        self.buffer = buffer
+        self.size = size
+        self.channels = channels
+
+    @property
+    def buffer_latency_ms(self):
+        """Time one mixer buffer takes to play - the floor on effect latency"""
+        return 1000.0 * self.buffer / self.frequency
+
+    def init_mixer(self):
+        """(Re)open the mixer with these settings"""
+        # pygame.init() already opens the mixer with its defaults, and
+        # pre_init() has no effect on an open mixer, so reopen it
+        if pygame.mixer.get_init():
+            pygame.mixer.quit()
+        pygame.mixer.init(frequency=self.frequency, size=self.size,
+                          channels=self.channels, buffer=self.buffer)
+        pygame.mixer.set_num_channels(MIXER_CHANNELS)
+
+    def __repr__(self):
+        return (f"MixerProfile({self.name!r}, {self.frequency} Hz, "
+                f"{self.buffer} frames, {self.buffer_latency_ms:.1f} ms)")
+
+
+PROFILES = {
+    # Original settings: very safe on slow machines, ~185 ms per effect
+    'conservative': MixerProfile('conservative', 22050, 4096),
+    'balanced': MixerProfile('balanced', 44100, 1024),
+    'low-latency': MixerProfile('low-latency', 44100, 256),
+}
+DEFAULT_PROFILE = 'balanced'
+
+
+def get_profile(profile):
+    """Resolve a profile name (or pass a MixerProfile through)"""
+    if profile is None:
+        return PROFILES[DEFAULT_PROFILE]
+    if isinstance(profile, MixerProfile):
+        return profile
+    return PROFILES[profile]
+
+
+def _wait_until_idle(channel, timeout):
+    """Poll a channel until it stops; returns the time it went idle"""
+    deadline = time.perf_counter() + timeout
+    while channel.get_busy() and time.perf_counter() < deadline:
+        time.sleep(0.0002)
+    return time.perf_counter()
+
+
+def measure_profile(profile, trials=20, click_ms=5, tone_seconds=1.0):
+    """Measure one profile on the real output device
+
+    latency_ms: queue-to-output delay per trigger, i.e. the time from
+    Channel.play() until the mixer has consumed a short click (minus the
+    click itself), plus the one buffer the device holds before output.
+    underruns: buffer periods lost while a long tone played. A starved
+    device stretches playback past its nominal length, and each whole
+    buffer period of stretch counts as one underrun.
+    """
+    profile.init_mixer()
+    frequency, _, channels = pygame.mixer.get_init()
+    frame_bytes = 2 * channels
+    period = profile.buffer / frequency
+    channel = pygame.mixer.Channel(0)
+
+    click_frames = int(frequency * click_ms / 1000)
+    click = pygame.mixer.Sound(buffer=b'\x00\x10' * channels * click_frames)
+    click_seconds = click_frames / frequency
+
+    latencies = []
+    for _ in range(trials):
+        start = time.perf_counter()
+        channel.play(click)
+        done = _wait_until_idle(channel, 2.0)
+        latencies.append(1000.0 * (done - start - click_seconds + period))
+        time.sleep(period)  # Let the device settle between triggers
+
+    tone_frames = int(frequency * tone_seconds)
+    tone = pygame.mixer.Sound(buffer=bytes(frame_bytes * tone_frames))
+    start = time.perf_counter()
+    channel.play(tone)
+    done = _wait_until_idle(channel, tone_seconds + 5.0)
+    # Allow for the trigger delay measured above before counting stretch
+    stretch = (done - start) - tone_seconds - statistics.median(latencies) / 1000.0
+    underruns = max(0, int(stretch / period))
+
+    latencies.sort()
+    return {
+        'profile': profile.name,
+        'frequency': frequency,
+        'buffer': profile.buffer,
+        'buffer_ms': round(profile.buffer_latency_ms, 2),
+        'latency_ms_p50': round(latencies[len(latencies) // 2], 2),
+        'latency_ms_max': round(latencies[-1], 2),
+        'underruns': underruns,
+    }
+
+
+def measure_latency(buffer_sizes=(256, 512, 1024, 2048, 4096), frequency=44100, trials=20):
+    """Measure latency and underruns for each buffer size"""
+    results = []
+    for buffer in buffer_sizes:
+        profile = MixerProfile(f"{buffer}", frequency, buffer)
+        try:
+            results.append(measure_profile(profile, trials))
+        except pygame.error as e:
+            results.append({'profile': profile.name, 'buffer': buffer, 'error': str(e)})
+    pygame.mixer.quit()
+    return results
+
+
+def print_report(results):
+    """Print measure_latency() results as a table"""
+    print(f"{'buffer':>7} {'rate':>6} {'buffer ms':>10} {'p50 ms':>8} {'max ms':>8} {'underruns':>10}")
+    for row in results:
+        if 'error' in row:
+            print(f"{row['buffer']:>7}  failed: {row['error']}")
+            continue
+        print(f"{row['buffer']:>7} {row['frequency']:>6} {row['buffer_ms']:>10.1f} "
+              f"{row['latency_ms_p50']:>8.1f} {row['latency_ms_max']:>8.1f} {row['underruns']:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure mixer latency per buffer size")
+    parser.add_argument('--buffers', default='256,512,1024,2048,4096',
+                        help="comma-separated buffer sizes in frames")
+    parser.add_argument('--frequency', type=int, default=44100)
+    parser.add_argument('--trials', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    buffers = [int(b) for b in args.buffers.split(',')]
+    print_report(measure_latency(buffers, args.frequency, args.trials))
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
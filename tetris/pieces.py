@@ -0,0 +1,47 @@
+# Tetromino rotation tables shared by every board backend
+
+# Simple piece shapes (classic 7 tetrominoes)
+PIECES = {
+    'I': [[(0, 1), (0, 0), (0, -1), (0, -2)],   # Vertical
+          [(-1, 0), (0, 0), (1, 0), (2, 0)]],   # Horizontal
+    'O': [[(0, 0), (1, 0), (0, 1), (1, 1)]],    # Square - no rotation
+    'T': [[(0, 0), (-1, 0), (1, 0), (0, -1)],   # T-piece - 4 rotations
+          [(0, 0), (0, -1), (0, 1), (1, 0)],
+          [(0, 0), (-1, 0), (1, 0), (0, 1)],
+          [(0, 0), (0, -1), (0, 1), (-1, 0)]],
+    'S': [[(0, 0), (-1, 0), (0, -1), (1, -1)],   # S-piece - 2 rotations
+          [(0, 0), (0, -1), (1, 0), (1, 1)]],
+    'Z': [[(0, 0), (1, 0), (0, -1), (-1, -1)],   # Z-piece - 2 rotations
+          [(0, 0), (0, 1), (1, 0), (1, -1)]],
+    'J': [[(0, 0), (-1, 0), (1, 0), (-1, -1)],   # J-piece - 4 rotations
+          [(0, 0), (0, -1), (0, 1), (1, -1)],
+          [(0, 0), (-1, 0), (1, 0), (1, 1)],
+          [(0, 0), (0, -1), (0, 1), (-1, 1)]],
+    'L': [[(0, 0), (-1, 0), (1, 0), (1, -1)],    # L-piece - 4 rotations
+          [(0, 0), (0, -1), (0, 1), (1, 1)],
+          [(0, 0), (-1, 0), (1, 0), (-1, 1)],
+          [(0, 0), (0, -1), (0, 1), (-1, -1)]]
+}
+
+PIECE_TYPES = list(PIECES.keys())
+
+# Everything a locked cell can hold: the pieces plus versus-mode garbage
+GARBAGE = 'G'
+CELL_TYPES = PIECE_TYPES + [GARBAGE]
+
+# Rotation lookup padded to four entries so callers can index with
+# (rotation & 3) instead of rotation % len(...)
+ROTATIONS = {
+    name: [shapes[r % len(shapes)] for r in range(4)]
+    for name, shapes in PIECES.items()
+}
+
+# Lowest cell of each rotation per column it covers: (dx, max dy) pairs,
+# so drop distances can be read off column heights
+COLUMN_BOTTOMS = {
+    name: [
+        tuple(sorted({dx: max(ddy for ddx, ddy in shape if ddx == dx) for dx, _ in shape}.items()))
+        for shape in shapes
+    ]
+    for name, shapes in ROTATIONS.items()
+}
@@ -0,0 +1,41 @@
+from tetris.pieces import PIECE_TYPES
+
+MASK32 = 0xFFFFFFFF
+
+
+def _mix_seed(seed):
+    """Spread a user seed over 32 bits (splitmix32-style) - xorshift needs a non-zero state"""
+    z = (seed + 0x9E3779B9) & MASK32
+    z = ((z ^ (z >> 16)) * 0x85EBCA6B) & MASK32
+    z = ((z ^ (z >> 13)) * 0xC2B2AE35) & MASK32
+    z ^= z >> 16
+    return z or 1
+
+
+class PieceRandomizer:
+    """Per-game piece generator on a 32-bit xorshift
+
+    Bit-exact across platforms and Python versions, and its whole state is
+    one 32-bit integer, so games can be replayed and snapshotted cheaply.
+    """
+
+    __slots__ = ('state',)
+
+    def __init__(self, seed):
+        self.state = _mix_seed(seed & MASK32)
+
+    def next_piece(self):
+        """Advance the generator and return the next piece type"""
+        x = self.state
+        x ^= (x << 13) & MASK32
+        x ^= x >> 17
+        x ^= (x << 5) & MASK32
+        self.state = x
+        # Scale to 0..6 with a multiply-shift instead of a biased modulo
+        return PIECE_TYPES[(x * len(PIECE_TYPES)) >> 32]
+
+    def getstate(self):
+        return self.state
+
+    def setstate(self, state):
+        self.state = state
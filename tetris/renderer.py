@@ -0,0 +1,429 @@
+import time
+import pygame
+from tetris.constants import *
+from tetris.pieces import CELL_TYPES, GARBAGE
+
+# surfarray needs NumPy; without it the playfield falls back to sprite blits
+try:
+    import numpy
+    import pygame.surfarray
+except ImportError:
+    numpy = None
+
+# Palette slot used for cell outlines and the board frame
+OUTLINE_INDEX = len(CELL_TYPES) + 1
+
+# Boards bigger than the standard one shrink their cells down to this size,
+# then show a window of the board that scrolls with the falling piece
+MIN_BLOCK_SIZE = 5
+# Cells kept between the falling piece and the edge of a scrolling window
+VIEW_MARGIN = 4
+# Seconds between refreshes of the performance HUD's text
+HUD_REFRESH = 0.5
+# Newest frames the HUD's percentiles cover: sorting the whole telemetry
+# ring on the render thread would cause the spikes it is measuring
+HUD_WINDOW = 120
+
+
+class Renderer:
+    """Retained-mode renderer: static layers are built once, frames only
+    redraw what changed and report the dirty rectangles
+
+    Everything is laid out in logical pixels on a SCREEN_WIDTH x
+    SCREEN_HEIGHT surface; tetris.display.Display scales it to the window.
+    """
+
+    def __init__(self, screen, width, height, colors, board_width=BOARD_WIDTH, board_height=BOARD_HEIGHT):
+        self.screen = screen
+        self.width = width
+        self.height = height
+        # Versus garbage is drawn gray unless the frontend picks a colour
+        self.colors = dict(colors)
+        self.colors.setdefault(GARBAGE, GRAY)
+        colors = self.colors
+
+        # Board placement: the standard board fills the playfield area at full
+        # block size, bigger boards get smaller cells and then a scrolling view
+        self.board_x = BOARD_X
+        self.board_y = BOARD_Y
+        self.board_width = board_width
+        self.board_height = board_height
+        area_width, area_height = BOARD_WIDTH * BLOCK_SIZE, BOARD_HEIGHT * BLOCK_SIZE
+        self.block_size = max(MIN_BLOCK_SIZE, min(BLOCK_SIZE, area_width // board_width,
+                                                  area_height // board_height))
+        self.view_columns = min(board_width, area_width // self.block_size)
+        self.view_rows = min(board_height, area_height // self.block_size)
+        # Top-left board cell of the view; the piece spawns top centre
+        self.view_x = (board_width - self.view_columns) // 2
+        self.view_y = 0
+        self.board_rect = pygame.Rect(self.board_x, self.board_y,
+                                      self.view_columns * self.block_size, self.view_rows * self.block_size)
+
+        # Fonts are created once, not every frame
+        self.font = pygame.font.Font(None, 36)
+        self.controls_font = pygame.font.Font(None, 20)
+
+        self.background = self._build_background()
+        self.blocks = {name: self._build_block(color) for name, color in colors.items()}
+        self.ghosts = {name: self._build_ghost(color) for name, color in colors.items()}
+        # Outline of where the falling piece will land
+        self.show_ghost = True
+        # Slide the falling piece between rows instead of stepping a row at a time
+        self.interpolate = False
+
+        # Playfield layer is 8-bit: cell codes index straight into the palette
+        self.playfield = pygame.Surface(self.board_rect.size, depth=8)
+        self.playfield.set_palette([BLACK] + [colors[name] for name in CELL_TYPES] + [WHITE])
+        self.block_sprites = [None] + [self.blocks[name] for name in CELL_TYPES]
+        if numpy is not None:
+            self._build_raster_tables()
+        self.overlays = {
+            'game_over': self._build_game_over_overlay(),
+            'paused': self._build_pause_overlay(),
+        }
+
+        # Numeric readouts: name -> (value, surface, rect)
+        self.value_positions = {'score': (PANEL_X, 130), 'lines': (PANEL_X, 210), 'level': (PANEL_X, 290)}
+        self.value_formats = {'score': "{:06d}", 'lines': "{:03d}", 'level': "{:02d}"}
+        self.values = {}
+
+        self.board_version = None
+        # Codes of the rows in view as last rasterized, and the stack top then:
+        # only rows at or below the stack can differ between two versions
+        self.view_codes = [None] * self.view_rows
+        self.stack_top = 0
+        self.sprites = []
+        self.overlay = None
+        self.needs_full_redraw = True
+        # Optional PerfHud drawn over the left panel
+        self.hud = None
+
+    def _build_background(self):
+        """Screen layer with everything that never changes"""
+        background = pygame.Surface((self.width, self.height))
+        background.fill(BLACK)
+
+        # Classic UI labels
+        for label, y in (("SCORE", 100), ("LINES", 180), ("LEVEL", 260)):
+            background.blit(self.font.render(label, True, WHITE), (PANEL_X, y))
+
+        # Simple controls
+        controls = ["← → MOVE", "↓ DROP", "SPACE HARD DROP", "↑ ROTATE", "P PAUSE", "R RESTART", "BKSP REWIND"]
+        for i, control in enumerate(controls):
+            text = self.controls_font.render(control, True, LIGHT_GRAY)
+            background.blit(text, (CONTROLS_X, 100 + i * 25))
+        return background
+
+    def _build_block(self, color):
+        """One board cell: filled square with a white outline"""
+        block = pygame.Surface((self.block_size, self.block_size))
+        block_rect = block.get_rect()
+        pygame.draw.rect(block, color, block_rect)
+        pygame.draw.rect(block, WHITE, block_rect, 1)
+        return block
+
+    def _build_ghost(self, color):
+        """Landing preview cell: just the outline in the piece colour"""
+        ghost = pygame.Surface((self.block_size, self.block_size))
+        ghost.fill(BLACK)
+        pygame.draw.rect(ghost, color, ghost.get_rect(), 1)
+        return ghost
+
+    def _build_overlay(self, texts):
+        """Semi-transparent dimming layer plus pre-rendered text, as a blit list"""
+        dim = pygame.Surface((self.width, self.height))
+        dim.set_alpha(128)  # 50% transparency
+        dim.fill(BLACK)
+        return [(dim, (0, 0))] + [(text, text.get_rect(center=center)) for text, center in texts]
+
+    def _build_game_over_overlay(self):
+        cx, cy = self.width // 2, self.height // 2
+        return self._build_overlay([
+            (pygame.font.Font(None, 72).render("GAME OVER", True, WHITE), (cx, cy)),
+            (pygame.font.Font(None, 24).render("PRESS R TO RESTART", True, WHITE), (cx, cy + 50)),
+        ])
+
+    def _build_pause_overlay(self):
+        cx, cy = self.width // 2, self.height // 2
+        # Large centered PAUSED text with a subtle shadow
+        pause_font = pygame.font.Font(None, 96)
+        return self._build_overlay([
+            (pause_font.render("PAUSED", True, DARK_GRAY), (cx + 3, cy + 3)),
+            (pause_font.render("PAUSED", True, WHITE), (cx, cy)),
+            (pygame.font.Font(None, 36).render("Press P to Resume", True, LIGHT_GRAY), (cx, cy + 80)),
+        ])
+
+    def _build_raster_tables(self):
+        """Pixel masks for rasterizing the playfield straight from cell codes"""
+        # Board frame, taken from an actual draw so it matches pixel for pixel
+        frame = pygame.Surface(self.board_rect.size, depth=8)
+        pygame.draw.rect(frame, 1, frame.get_rect(), 2)
+        self.frame_mask = pygame.surfarray.array2d(frame) != 0
+
+        # Cell outline pattern tiled across the whole view
+        block = pygame.Surface((self.block_size, self.block_size), depth=8)
+        pygame.draw.rect(block, 1, block.get_rect(), 1)
+        outline = pygame.surfarray.array2d(block) != 0
+        self.outline_mask = numpy.tile(outline, (self.view_columns, self.view_rows))
+
+    def _follow(self, game):
+        """Scroll a view smaller than the board to keep the falling piece in it
+
+        Returns True when the view moved. It jumps a quarter (rows) or half
+        (columns) of a view at a time rather than a cell, so scrolling - a
+        full re-rasterize of the view - stays rare.
+        """
+        if game.current_type is None:
+            return False
+        view_x, view_y = self.view_x, self.view_y
+        if self.view_rows < self.board_height:
+            y = game.current_y
+            if not view_y + VIEW_MARGIN <= y <= view_y + self.view_rows - VIEW_MARGIN - 4:
+                view_y = max(0, min(y - self.view_rows // 4, self.board_height - self.view_rows))
+        if self.view_columns < self.board_width:
+            x = game.current_x
+            if not view_x + VIEW_MARGIN <= x <= view_x + self.view_columns - VIEW_MARGIN - 4:
+                view_x = max(0, min(x + 2 - self.view_columns // 2, self.board_width - self.view_columns))
+        if (view_x, view_y) == (self.view_x, self.view_y):
+            return False
+        self.view_x, self.view_y = view_x, view_y
+        # Everything in view is new: forget the cached rows
+        self.view_codes = [None] * self.view_rows
+        self.stack_top = 0
+        return True
+
+    def _update_playfield(self, board):
+        """Re-rasterize the rows in view that changed; returns their screen rect
+
+        Only rows from the stack top down are fetched and compared, and only
+        the band between the first and last changed row is redrawn, so a
+        placement costs about the rows it touched whatever the board's size.
+        """
+        top, bottom = self.view_y, self.view_y + self.view_rows
+        stack_top = board.height - max(board.column_heights)
+        # Rows above the stack, now and at the last update, are empty both times
+        first = max(top, min(stack_top, self.stack_top))
+        self.stack_top = stack_top
+        if first >= bottom:
+            return None
+
+        width = board.width
+        codes = board.codes(first, bottom)
+        cached = self.view_codes
+        changed = [y for y in range(first - top, bottom - top)
+                   if cached[y] != codes[(y + top - first) * width:(y + top - first + 1) * width]]
+        if not changed:
+            return None
+        start, end = changed[0], changed[-1] + 1
+        for y in range(start, end):
+            cached[y] = codes[(y + top - first) * width:(y + top - first + 1) * width]
+        self._rasterize(start, end)
+
+        size = self.block_size
+        return pygame.Rect(self.board_x, self.board_y + start * size,
+                           self.board_rect.width, (end - start) * size)
+
+    def _rasterize(self, start, end):
+        """Draw view rows start..end-1 from view_codes into the playfield layer"""
+        size = self.block_size
+        left, right = self.view_x, self.view_x + self.view_columns
+        if numpy is None:
+            # Pre-baked block sprites, pushed in a single blits() call
+            band = pygame.Rect(0, start * size, self.board_rect.width, (end - start) * size)
+            self.playfield.set_clip(band)
+            self.playfield.fill(0)
+            pygame.draw.rect(self.playfield, OUTLINE_INDEX, self.playfield.get_rect(), 2)
+            self.playfield.blits([
+                (self.block_sprites[code], (x * size, y * size))
+                for y in range(start, end)
+                for x, code in enumerate(self.view_codes[y][left:right]) if code
+            ], doreturn=False)
+            self.playfield.set_clip(None)
+            return
+
+        # One palette-index array for the band, scaled up by repetition
+        rows = b''.join(self.view_codes[start:end])
+        cells = numpy.frombuffer(rows, dtype=numpy.uint8).reshape(end - start, self.board_width)
+        pixels = cells[:, left:right].T.repeat(size, axis=0).repeat(size, axis=1)
+        band = slice(start * size, end * size)
+        filled = pixels != 0
+        pixels[filled & self.outline_mask[:, band]] = OUTLINE_INDEX
+        pixels[~filled & self.frame_mask[:, band]] = OUTLINE_INDEX
+        target = pygame.surfarray.pixels2d(self.playfield)
+        target[:, band] = pixels
+        del target  # Unlocks the surface
+
+    def _cell_rects(self, piece_shape, piece_x, piece_y, offset=0):
+        """Screen rects of a piece's cells in view, `offset` pixels lower"""
+        rects = []
+        for dx, dy in piece_shape:
+            x = piece_x + dx - self.view_x
+            y = piece_y + dy - self.view_y
+            # Only draw if within the view
+            if 0 <= x < self.view_columns and 0 <= y < self.view_rows:
+                rects.append(pygame.Rect(self.board_x + x * self.block_size,
+                                         self.board_y + y * self.block_size + offset,
+                                         self.block_size, self.block_size))
+        return rects
+
+    def _piece_sprites(self, game):
+        """(sprite, rect) blits for the ghost and the falling piece, in draw order"""
+        if game.current_type is None or game.game_over:
+            return []
+
+        piece_shape = game.pieces[game.current_type][game.current_rotation % len(game.pieces[game.current_type])]
+        sprites = []
+        if self.show_ghost:
+            # Column heights make the landing row an O(1) lookup, not a scan
+            distance = game.drop_distance()
+            if distance > 0:
+                ghost = self.ghosts[game.current_type]
+                sprites = [(ghost, rect) for rect in
+                           self._cell_rects(piece_shape, game.current_x, game.current_y + distance)]
+        offset = int(game.fall_progress() * self.block_size) if self.interpolate else 0
+        block = self.blocks[game.current_type]
+        sprites += [(block, rect) for rect in
+                    self._cell_rects(piece_shape, game.current_x, game.current_y, offset)]
+        return sprites
+
+    def _draw_values(self, game, force):
+        """Re-render numeric readouts whose value changed; returns dirty rects"""
+        dirty = []
+        for name, position in self.value_positions.items():
+            value = getattr(game, name)
+            cached = self.values.get(name)
+            if cached is not None and cached[0] == value and not force:
+                continue
+
+            surface = self.font.render(self.value_formats[name].format(value), True, WHITE)
+            rect = surface.get_rect(topleft=position)
+            if cached is not None:
+                # Erase the previous text
+                self.screen.blit(self.background, cached[2], cached[2])
+                rect = rect.union(cached[2])
+            self.screen.blit(surface, position)
+            self.values[name] = (value, surface, surface.get_rect(topleft=position))
+            dirty.append(rect)
+        return dirty
+
+    def invalidate(self):
+        """Force the next frame to redraw the whole screen"""
+        self.needs_full_redraw = True
+
+    def draw(self, game):
+        """Draw a frame and return the list of screen rects that changed"""
+        if game.game_over:
+            overlay = 'game_over'
+        elif game.paused:
+            overlay = 'paused'
+        else:
+            overlay = None
+
+        if overlay != self.overlay:
+            self.overlay = overlay
+            self.needs_full_redraw = True
+
+        scrolled = self._follow(game)
+        band = None
+        if scrolled or game.board_version != self.board_version:
+            self.board_version = game.board_version
+            band = self._update_playfield(game.board)
+        if scrolled:
+            band = self.board_rect
+
+        sprites = self._piece_sprites(game)
+
+        if self.needs_full_redraw:
+            self.needs_full_redraw = False
+            self.screen.blit(self.background, (0, 0))
+            self.screen.blit(self.playfield, self.board_rect)
+            self.screen.blits(sprites, doreturn=False)
+            self.sprites = sprites
+            self._draw_values(game, force=True)
+            if overlay is not None:
+                self.screen.blits(self.overlays[overlay])
+            if self.hud is not None:
+                self.hud.draw(self.screen, self.background, force=True)
+            return [self.screen.get_rect()]
+
+        # Overlays freeze the frame underneath them
+        if overlay is not None:
+            return []
+
+        dirty = []
+        if band is not None or sprites != self.sprites:
+            # Erase the old piece and ghost from the (updated) playfield, copy
+            # over the rows that changed, then draw the piece on top
+            for _, rect in self.sprites:
+                self.screen.blit(self.playfield, rect, rect.move(-self.board_x, -self.board_y))
+                dirty.append(rect)
+            if band is not None:
+                self.screen.blit(self.playfield, band, band.move(-self.board_x, -self.board_y))
+                dirty.append(band)
+            self.screen.blits(sprites, doreturn=False)
+            dirty.extend(rect for _, rect in sprites)
+            self.sprites = sprites
+
+        dirty.extend(self._draw_values(game, force=False))
+        if self.hud is not None:
+            dirty.extend(self.hud.draw(self.screen, self.background))
+        return dirty
+
+
+class PerfHud:
+    """Toggleable frame-timing readout (see tetris.telemetry.FrameTimings)
+
+    The text is re-rendered every HUD_REFRESH seconds, not every frame, so
+    while it is up a frame costs at most one erase and a few small blits.
+    Percentiles cover the last HUD_WINDOW frames; the whole ring is left to
+    FrameTimings.dump().
+    """
+
+    def __init__(self, timings, position=(PANEL_X, 360)):
+        self.timings = timings
+        self.position = position
+        self.font = pygame.font.Font(None, 20)
+        self.visible = False
+        self.lines = []  # (surface, position)
+        self.rect = None  # Screen area covered by the lines now drawn
+        self.next_refresh = 0.0
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.next_refresh = 0.0
+
+    def _render_lines(self):
+        timings = self.timings
+        summary = timings.summary(HUD_WINDOW)
+        texts = [f"{'ms':<8}{'p50':>6}{'p95':>6}{'p99':>6}"]
+        for name, stats in summary['phases'].items():
+            texts.append(f"{name:<8}{stats['p50_ms']:>6.1f}{stats['p95_ms']:>6.1f}{stats['p99_ms']:>6.1f}")
+        texts.append(f"dropped {summary['dropped']} ({summary['dropped_kept']} of last {summary['kept']})")
+
+        x, y = self.position
+        height = self.font.get_linesize()
+        self.lines = [(self.font.render(text, True, LIGHT_GRAY), (x, y + i * height))
+                      for i, text in enumerate(texts)]
+
+    def draw(self, screen, background, force=False):
+        """Draw, refresh or erase the readout; returns the dirty rects"""
+        old = self.rect
+        if not self.visible:
+            if old is None:
+                return []
+            screen.blit(background, old, old)
+            self.rect = None
+            return [old]
+
+        now = time.perf_counter()
+        if now >= self.next_refresh:
+            self.next_refresh = now + HUD_REFRESH
+            self._render_lines()
+        elif not force:
+            return []
+
+        if old is not None and not force:
+            screen.blit(background, old, old)
+        rects = screen.blits(self.lines)
+        self.rect = rects[0].unionall(rects[1:])
+        return [self.rect.union(old) if old is not None else self.rect]
@@ -0,0 +1,171 @@
+import argparse
+import struct
+import sys
+import time
+from tetris.bitboard import BitBoard
+from tetris.engine import TetrisEngine, RULES_VERSION
+
+# File layout (little-endian):
+#   header  - magic, format version, rules version, board width/height, seed
+#   events  - varint tick delta + action byte, one pair per input
+#   end     - varint tick delta to the final tick + END_MARKER
+#   trailer - final score, lines and level, for verification
+MAGIC = b'RTRP'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBHHHI')
+TRAILER = struct.Struct('<IIH')
+END_MARKER = 0xFF
+
+
+class ReplayMismatch(Exception):
+    """A replay did not reproduce the recorded result"""
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class ReplayRecorder:
+    """Logs (tick, action) pairs for one game in the compact replay format"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.data = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, RULES_VERSION,
+                                          engine.board.width, engine.board.height, engine.seed))
+        self.last_tick = 0
+        self.saved = False
+        self.marks = []  # (tick, data length before the event) for truncate()
+
+    def record(self, action):
+        """Log an action about to be applied at the engine's current tick"""
+        tick = self.engine.frame
+        self.marks.append((self.last_tick, len(self.data)))
+        _write_varint(self.data, tick - self.last_tick)
+        self.data.append(action)
+        self.last_tick = tick
+
+    def truncate(self, tick):
+        """Forget events from `tick` on (after the engine was rewound to it)"""
+        while self.marks and self.last_tick >= tick:
+            self.last_tick, length = self.marks.pop()
+            del self.data[length:]
+
+    def finish(self):
+        """Replay bytes for the game so far, ending at the current tick"""
+        data = bytearray(self.data)
+        _write_varint(data, self.engine.frame - self.last_tick)
+        data.append(END_MARKER)
+        data += TRAILER.pack(self.engine.score, self.engine.lines, self.engine.level)
+        return bytes(data)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.finish())
+        self.saved = True
+
+
+class Replay:
+    """A parsed replay file"""
+
+    def __init__(self, data):
+        magic, version, rules, width, height, seed = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("not a replay file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported replay format {version}")
+        self.rules_version = rules
+        self.width = width
+        self.height = height
+        self.seed = seed
+
+        # Decode the event stream into absolute ticks
+        self.events = []
+        pos = HEADER.size
+        tick = 0
+        while True:
+            delta, pos = _read_varint(data, pos)
+            tick += delta
+            action = data[pos]
+            pos += 1
+            if action == END_MARKER:
+                break
+            self.events.append((tick, action))
+        self.final_tick = tick
+        self.score, self.lines, self.level = TRAILER.unpack_from(data, pos)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def play(self, board_class=BitBoard):
+        """Re-run the game headless as fast as possible; returns the engine"""
+        if self.rules_version != RULES_VERSION:
+            raise ValueError(f"replay uses rules v{self.rules_version}, engine is v{RULES_VERSION}")
+
+        engine = TetrisEngine(board_class=board_class, seed=self.seed,
+                              width=self.width, height=self.height)
+
+        events = self.events
+        index = 0
+        count = len(events)
+        tick = engine.tick
+        apply = engine.apply
+        while True:
+            # Inputs at a tick are applied before that tick's gravity
+            while index < count and events[index][0] == engine.frame:
+                apply(events[index][1])
+                index += 1
+            if engine.frame >= self.final_tick:
+                break
+            tick()
+        return engine
+
+    def verify(self, board_class=BitBoard):
+        """Replay and check the final score and lines match the recording"""
+        engine = self.play(board_class)
+        expected = (self.score, self.lines, self.level)
+        actual = (engine.score, engine.lines, engine.level)
+        if actual != expected:
+            raise ReplayMismatch(f"expected score/lines/level {expected}, got {actual}")
+        return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run replay files headless and verify them")
+    parser.add_argument('replays', nargs='+', help="replay files written with --record")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.replays:
+        replay = Replay.load(path)
+        start = time.perf_counter()
+        try:
+            replay.verify()
+            status = "OK"
+        except (ReplayMismatch, ValueError) as e:
+            status = f"FAILED: {e}"
+            failed += 1
+        elapsed = time.perf_counter() - start
+        print(f"{path}: seed {replay.seed}, {replay.final_tick} ticks, "
+              f"score {replay.score}, lines {replay.lines} - {status} ({elapsed:.3f}s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,346 +1,260 @@
 import pygame
-import random
-import time
+from tetris.bitboard import BitBoard
 from tetris.constants import *
-from tetris.universal_audio import UniversalAudio
+from tetris.engine import TetrisEngine, ACTION_RESTART
+from tetris.keyboard import KeyboardInput
+from tetris.replay import ReplayRecorder
+from tetris.renderer import Renderer
+from tetris.rewind import RewindBuffer
+from tetris.timing import FixedTimestep
+from tetris.universal_audio import SilentAudio, UniversalAudio
+
+def _engine_attribute(name, writable=True):
+    """Expose an engine attribute on the pygame frontend (with no setter unless `writable`)"""
+    def getter(self):
+        return getattr(self.engine, name)
+
+    def setter(self, value):
+        setattr(self.engine, name, value)
+
+    return property(getter, setter if writable else None)
+
 
 class RetroTetris:
     """Classic retro Tetris game with authentic 1980s features only"""
     
-    def __init__(self, screen, width, height):
+    # Game state lives in the headless engine
+    board = _engine_attribute('board')
+    current_piece = _engine_attribute('current_piece')
+    current_x = _engine_attribute('current_x')
+    current_y = _engine_attribute('current_y')
+    current_rotation = _engine_attribute('current_rotation')
+    current_type = _engine_attribute('current_type')
+    score = _engine_attribute('score')
+    lines = _engine_attribute('lines')
+    level = _engine_attribute('level')
+    fall_time = _engine_attribute('fall_time')
+    fall_speed = _engine_attribute('fall_speed', writable=False)
+    game_over = _engine_attribute('game_over')
+    paused = _engine_attribute('paused')
+    board_version = _engine_attribute('board_version')
+    
+    # Shared by every instance, never copied
+    pieces = TetrisEngine.pieces
+    # Classic colors (NES Tetris palette)
+    colors = {
+        'I': CYAN, 'O': YELLOW, 'T': PURPLE, 'S': GREEN,
+        'Z': RED, 'J': BLUE, 'L': ORANGE
+    }
+    
+    def __init__(self, screen=None, width=SCREEN_WIDTH, height=SCREEN_HEIGHT, audio_profile=None, seed=None,
+                 record_path=None, controller=None, keyboard=None, rewind_seconds=None,
+                 startup=None, audio=None, board_width=BOARD_WIDTH, board_height=BOARD_HEIGHT):
+        # screen is the logical-size surface to draw on (tetris.display
+        # scales it to the window), None runs without drawing; audio (a
+        # UniversalAudio, SilentAudio or compatible object) defaults to
+        # UniversalAudio when there is a screen and to SilentAudio without one;
+        # likewise the keyboard and a 10 s rewind only come with a screen, so
+        # a headless game stays about the size of its engine
         self.screen = screen
         self.width = width
         self.height = height
         
-        # Classic Tetris board
-        self.board = [[None for _ in range(10)] for _ in range(20)]
-        
-        # Simple piece shapes (classic 7 tetrominoes)
-        self.pieces = {
-            'I': [[(0, 1), (0, 0), (0, -1), (0, -2)],   # Vertical
-                  [(-1, 0), (0, 0), (1, 0), (2, 0)]],   # Horizontal
-            'O': [[(0, 0), (1, 0), (0, 1), (1, 1)]],    # Square - no rotation
-            'T': [[(0, 0), (-1, 0), (1, 0), (0, -1)],   # T-piece - 4 rotations
-                  [(0, 0), (0, -1), (0, 1), (1, 0)],
-                  [(0, 0), (-1, 0), (1, 0), (0, 1)],
-                  [(0, 0), (0, -1), (0, 1), (-1, 0)]],
-            'S': [[(0, 0), (-1, 0), (0, -1), (1, -1)],   # S-piece - 2 rotations
-                  [(0, 0), (0, -1), (1, 0), (1, 1)]],
-            'Z': [[(0, 0), (1, 0), (0, -1), (-1, -1)],   # Z-piece - 2 rotations
-                  [(0, 0), (0, 1), (1, 0), (1, -1)]],
-            'J': [[(0, 0), (-1, 0), (1, 0), (-1, -1)],   # J-piece - 4 rotations
-                  [(0, 0), (0, -1), (0, 1), (1, -1)],
-                  [(0, 0), (-1, 0), (1, 0), (1, 1)],
-                  [(0, 0), (0, -1), (0, 1), (-1, 1)]],
-            'L': [[(0, 0), (-1, 0), (1, 0), (1, -1)],    # L-piece - 4 rotations
-                  [(0, 0), (0, -1), (0, 1), (1, 1)],
-                  [(0, 0), (-1, 0), (1, 0), (-1, 1)],
-                  [(0, 0), (0, -1), (0, 1), (-1, -1)]]
-        }
-        
-        # Classic colors (NES Tetris palette)
-        self.colors = {
-            'I': CYAN, 'O': YELLOW, 'T': PURPLE, 'S': GREEN,
-            'Z': RED, 'J': BLUE, 'L': ORANGE
-        }
-        
-        # Game state
-        self.current_piece = None
-        self.current_x = 5
-        self.current_y = 0
-        self.current_rotation = 0
-        self.current_type = None
-        
-        # Classic scoring (original Nintendo scoring)
-        self.score = 0
-        self.lines = 0
-        self.level = 0
-        
-        # Timing
-        self.fall_time = 0
-        self.fall_speed = 1.0  # 1 second initially
-        
-        # Game state
-        self.game_over = False
-        self.paused = False
-        
-        # Audio system (universal compatibility)
-        self.audio = UniversalAudio()
-        
-        # Spawn first piece
-        self.spawn_piece()
-        
-        # Start background music
-        self.audio.start_music()
+        # Headless rules engine on the compact bitmask board (spawns the first
+        # piece); any board size works, from the standard 10x20 to stress boards
+        self.engine = TetrisEngine(board_class=BitBoard, seed=seed,
+                                   width=board_width, height=board_height)
+        
+        # Wall-clock time to whole simulation ticks (TICK_RATE, NES frames)
+        self.timestep = FixedTimestep()
+        
+        # Optional replay recording of the current game
+        self.record_path = record_path
+        self.recorder = ReplayRecorder(self.engine) if record_path else None
+        
+        # Optional non-keyboard player (e.g. tetris.bot.AutoPlayer), asked for one action per tick
+        self.controller = controller
+        # Key events -> per-tick actions with auto-repeat and latency histograms
+        # (headless: built by the first handle_input())
+        if keyboard is None and screen is not None:
+            keyboard = KeyboardInput()
+        self.keyboard = keyboard
+        
+        # Per-tick snapshots of the last few seconds; hold BACKSPACE to rewind
+        if rewind_seconds is None:
+            rewind_seconds = 10.0 if screen is not None else 0
+        self.rewind = RewindBuffer(self.engine, rewind_seconds) if rewind_seconds else None
+        self.rewinding = False
+        
+        # Fonts, labels and overlays are built once here
+        self.renderer = (Renderer(screen, width, height, self.colors, board_width, board_height)
+                         if screen is not None else None)
+        
+        # Audio system (universal compatibility); the mixer opens and the music
+        # is synthesized on a background thread so the first frame isn't held up
+        if audio is None:
+            audio = (UniversalAudio(audio_profile, background=True, startup=startup)
+                     if screen is not None else SilentAudio())
+        self.audio = audio
+        self.engine.listener = self._on_engine_event
+        
+        # Start background music (as soon as the audio is ready)
+        if not self.game_over:
+            self.audio.start_music()
     
     def spawn_piece(self):
         """Spawn a new random piece"""
-        self.current_type = random.choice(list(self.pieces.keys()))
-        self.current_piece = self.current_type  # Fix: Set current_piece
-        self.current_x = 4  # Center better (0-9 board, so 4 is more centered)
-        self.current_y = 0
-        self.current_rotation = 0
-        
-        # Check game over
-        if not self.is_valid_position():
-            self.game_over = True
-            self.audio.stop_music()
-            self.audio.play_sound('game_over')
+        self.engine.spawn_piece()
     
     def is_valid_position(self, test_x=None, test_y=None, test_rotation=None):
         """Check if current piece position is valid"""
-        x = test_x if test_x is not None else self.current_x
-        y = test_y if test_y is not None else self.current_y
-        rotation = test_rotation if test_rotation is not None else self.current_rotation
-        
-        piece_shape = self.pieces[self.current_type][rotation % len(self.pieces[self.current_type])]
-        
-        for dx, dy in piece_shape:
-            new_x = x + dx
-            new_y = y + dy
-            
-            # Check bounds
-            if new_x < 0 or new_x >= 10 or new_y >= 20:
-                return False
-            
-            # Check collision (allow pieces above board)
-            if new_y >= 0 and self.board[new_y][new_x] is not None:
-                return False
-        
-        return True
+        return self.engine.is_valid_position(test_x, test_y, test_rotation)
     
     def place_piece(self):
         """Place current piece on board"""
-        piece_shape = self.pieces[self.current_type][self.current_rotation % len(self.pieces[self.current_type])]
-        color = self.colors[self.current_type]
-        
-        for dx, dy in piece_shape:
-            x = self.current_x + dx
-            y = self.current_y + dy
-            if 0 <= y < 20 and 0 <= x < 10:
-                self.board[y][x] = color
-        
-        # Clear lines
-        self.clear_lines()
-        
-        # Spawn next piece
-        self.spawn_piece()
+        self.engine.place_piece()
     
     def clear_lines(self):
         """Clear completed lines (classic Tetris line clearing)"""
-        lines_cleared = 0
-        y = 19
-        
-        while y >= 0:
-            if all(self.board[y][x] is not None for x in range(10)):
-                # Line is complete - remove it
-                del self.board[y]
-                self.board.insert(0, [None for _ in range(10)])
-                lines_cleared += 1
-            else:
-                y -= 1
-        
-        # Play line clear sound
-        if lines_cleared > 0:
-            self.audio.play_sound('line_clear')
-        
-        # Classic scoring
-        if lines_cleared > 0:
-            line_scores = [0, 40, 100, 300, 1200]  # Original Nintendo scoring
-            self.score += line_scores[lines_cleared] * (self.level + 1)
-            self.lines += lines_cleared
-            
-            # Level up every 10 lines (classic)
-            old_level = self.level
-            new_level = self.lines // 10
-            if new_level > self.level:
-                self.level = new_level
-                # Classic speed curve (gets very fast)
-                self.fall_speed = max(0.1, 1.0 - (self.level * 0.1))
+        return self.engine.clear_lines()
     
     def move_piece(self, dx, dy):
         """Try to move piece"""
-        if self.is_valid_position(self.current_x + dx, self.current_y + dy):
-            self.current_x += dx
-            self.current_y += dy
-            return True
-        return False
+        return self.engine.move_piece(dx, dy)
     
     def rotate_piece(self):
         """Try to rotate piece"""
-        new_rotation = (self.current_rotation + 1) % len(self.pieces[self.current_type])
-        if self.is_valid_position(test_rotation=new_rotation):
-            self.current_rotation = new_rotation
-            return True
-        return False
+        return self.engine.rotate_piece()
     
-    def handle_input(self, event):
-        """Handle classic Tetris input"""
-        if event.type == pygame.KEYDOWN:
-            if self.game_over:
-                if event.key == pygame.K_r:
-                    self.restart()
-                return
-            
-            if event.key == pygame.K_p:
-                self.paused = not self.paused
-                if self.paused:
-                    self.audio.pause_music()
-                else:
-                    self.audio.resume_music()
-            elif not self.paused:
-                if event.key == pygame.K_LEFT:
-                    self.move_piece(-1, 0)
-                elif event.key == pygame.K_RIGHT:
-                    self.move_piece(1, 0)
-                elif event.key == pygame.K_DOWN:
-                    if self.move_piece(0, 1):
-                        self.score += 1  # Soft drop bonus
-                elif event.key == pygame.K_UP:
-                    self.rotate_piece()
+    def fall_progress(self):
+        """How far (0..1) the piece is towards its next gravity row, for smooth drawing"""
+        engine = self.engine
+        if engine.game_over or engine.paused or engine.drop_distance() == 0:
+            return 0.0
+        rows, ticks = engine.gravity
+        progress = (engine.fall_time + rows * self.timestep.alpha) / ticks
+        return min(progress, 1.0)
     
-    def update(self, dt):
-        """Update game logic"""
-        if self.game_over or self.paused:
+    def drop_distance(self):
+        """Rows the current piece can still fall"""
+        return self.engine.drop_distance()
+    
+    def hard_drop(self):
+        """Drop and lock the current piece"""
+        self.engine.hard_drop()
+    
+    def _on_engine_event(self, event):
+        """Turn engine events into audio feedback"""
+        if event == 'game_over':
+            self.audio.stop_music()
+            self.audio.play_sound('game_over')
+            self._save_replay()
+        elif event == 'pause':
+            self.audio.pause_music()
+        elif event == 'resume':
+            self.audio.resume_music()
+        elif event == 'restart':
+            if self.record_path:
+                self.recorder = ReplayRecorder(self.engine)
+            if self.rewind is not None:
+                self.rewind.clear()
+            self.audio.start_music()
+        else:
+            # line_clear, tetris, drop, rotate
+            self.audio.play_sound(event)
+    
+    def handle_input(self, event, timestamp=None):
+        """Queue a key event for the next simulation tick"""
+        if event.type in (pygame.KEYDOWN, pygame.KEYUP) and event.key == pygame.K_BACKSPACE:
+            self.rewinding = event.type == pygame.KEYDOWN and self.rewind is not None
             return
-        
-        # Simple gravity
-        self.fall_time += dt
-        if self.fall_time >= self.fall_speed:
-            self.fall_time = 0
-            if not self.move_piece(0, 1):
-                self.place_piece()
+        if self.keyboard is None:
+            self.keyboard = KeyboardInput()
+        self.keyboard.push(event, timestamp)
+    
+    def snapshot(self):
+        """Compact fixed-size bytes of the whole game state"""
+        return self.engine.snapshot()
+    
+    def restore(self, data):
+        """Return to a snapshot(), keeping the recording and music in step"""
+        was_over = self.engine.game_over
+        self.engine.restore(data)
+        self._restored(was_over)
+    
+    def _restored(self, was_over):
+        """Drop recorded inputs past the restored tick; bring the music back after a game over"""
+        if self.recorder is not None:
+            self.recorder.truncate(self.engine.frame)
+            self.recorder.saved = False
+        if was_over and not self.engine.game_over:
+            self.audio.start_music()
+    
+    def apply_action(self, action):
+        """Record (if recording) and apply one action"""
+        if self.recorder is not None and action != ACTION_RESTART:
+            self.recorder.record(action)
+        self.engine.apply(action)
+    
+    def update(self, dt):
+        """Update game logic - runs as many fixed ticks as dt covers"""
+        engine = self.engine
+        for _ in range(self.timestep.advance(dt)):
+            if self.rewinding:
+                self._rewind_tick()
+                continue
+            actions = self.keyboard.tick_actions() if self.keyboard is not None else ()
+            blocked = set()
+            for action, timestamp in actions:
+                if timestamp is None:
+                    # Instant auto-repeat bursts stop at the wall, so the
+                    # replay doesn't record the moves that went nowhere
+                    if action in blocked:
+                        continue
+                    before = (engine.current_x, engine.current_y)
+                    self.apply_action(action)
+                    if before == (engine.current_x, engine.current_y):
+                        blocked.add(action)
+                    continue
+                # Time key presses that change what is on screen
+                before = (engine.current_x, engine.current_y, engine.current_rotation,
+                          engine.pieces_placed, engine.paused, engine.game_over)
+                self.apply_action(action)
+                if before != (engine.current_x, engine.current_y, engine.current_rotation,
+                              engine.pieces_placed, engine.paused, engine.game_over):
+                    self.keyboard.applied(timestamp)
+            if self.controller is not None:
+                self.apply_action(self.controller.next_action(engine))
+            # Paused and game-over ticks change nothing worth rewinding through
+            idle = engine.game_over or engine.paused
+            engine.tick()
+            if self.rewind is not None and not idle:
+                self.rewind.record()
+    
+    def _rewind_tick(self):
+        """Step back one recorded tick while the rewind key is held"""
+        was_over = self.engine.game_over
+        if self.rewind.rewind():
+            self._restored(was_over)
+    
+    def _save_replay(self):
+        """Write the recording of the current game, if recording"""
+        if self.recorder is not None and not self.recorder.saved:
+            self.recorder.save(self.record_path)
     
     def render(self):
-        """Render classic Tetris"""
-        # Clear screen
-        self.screen.fill(BLACK)
-        
-        # Draw board
-        board_x = 300
-        board_y = 50
-        block_size = 25
-        
-        # Board background
-        board_rect = pygame.Rect(board_x, board_y, 10 * block_size, 20 * block_size)
-        pygame.draw.rect(self.screen, BLACK, board_rect)
-        pygame.draw.rect(self.screen, WHITE, board_rect, 2)
-        
-        # Draw placed pieces (only within board bounds)
-        for y in range(20):
-            for x in range(10):
-                if self.board[y][x] is not None:
-                    block_rect = pygame.Rect(
-                        board_x + x * block_size,
-                        board_y + y * block_size,
-                        block_size, block_size
-                    )
-                    pygame.draw.rect(self.screen, self.board[y][x], block_rect)
-                    pygame.draw.rect(self.screen, WHITE, block_rect, 1)
-        
-        # Draw current piece (only within board bounds and below UI)
-        if self.current_type is not None and not self.game_over:
-            piece_shape = self.pieces[self.current_type][self.current_rotation % len(self.pieces[self.current_type])]
-            color = self.colors[self.current_type]
-            
-            for dx, dy in piece_shape:
-                x = self.current_x + dx
-                y = self.current_y + dy
-                # Only draw if within board bounds AND below the top UI area
-                if 0 <= x < 10 and 0 <= y < 20 and y >= 0:
-                    block_rect = pygame.Rect(
-                        board_x + x * block_size,
-                        board_y + y * block_size,
-                        block_size, block_size
-                    )
-                    pygame.draw.rect(self.screen, color, block_rect)
-                    pygame.draw.rect(self.screen, WHITE, block_rect, 1)
-        
-        # Classic UI (drawn AFTER pieces so it appears on top)
-        font = pygame.font.Font(None, 36)
-        
-        # Score
-        score_text = font.render(f"SCORE", True, WHITE)
-        self.screen.blit(score_text, (50, 100))
-        score_value = font.render(f"{self.score:06d}", True, WHITE)
-        self.screen.blit(score_value, (50, 130))
-        
-        # Lines
-        lines_text = font.render(f"LINES", True, WHITE)
-        self.screen.blit(lines_text, (50, 180))
-        lines_value = font.render(f"{self.lines:03d}", True, WHITE)
-        self.screen.blit(lines_value, (50, 210))
-        
-        # Level
-        level_text = font.render(f"LEVEL", True, WHITE)
-        self.screen.blit(level_text, (50, 260))
-        level_value = font.render(f"{self.level:02d}", True, WHITE)
-        self.screen.blit(level_value, (50, 290))
-        
-        # Simple controls
-        controls_font = pygame.font.Font(None, 20)
-        controls = ["← → MOVE", "↓ DROP", "↑ ROTATE", "P PAUSE", "R RESTART"]
-        for i, control in enumerate(controls):
-            text = controls_font.render(control, True, LIGHT_GRAY)
-            self.screen.blit(text, (600, 100 + i * 25))
-        
-        # Game over (drawn last so it's on top of everything)
-        if self.game_over:
-            overlay = pygame.Surface((self.width, self.height))
-            overlay.set_alpha(128)
-            overlay.fill(BLACK)
-            self.screen.blit(overlay, (0, 0))
-            
-            game_over_font = pygame.font.Font(None, 72)
-            game_over_text = game_over_font.render("GAME OVER", True, WHITE)
-            text_rect = game_over_text.get_rect(center=(self.width // 2, self.height // 2))
-            self.screen.blit(game_over_text, text_rect)
-            
-            restart_font = pygame.font.Font(None, 24)
-            restart_text = restart_font.render("PRESS R TO RESTART", True, WHITE)
-            restart_rect = restart_text.get_rect(center=(self.width // 2, self.height // 2 + 50))
-            self.screen.blit(restart_text, restart_rect)
-        
-        # Pause (drawn last so it's on top of everything)
-        if self.paused and not self.game_over:
-            # Semi-transparent overlay
-            overlay = pygame.Surface((self.width, self.height))
-            overlay.set_alpha(128)  # 50% transparency
-            overlay.fill((0, 0, 0))  # Black overlay
-            self.screen.blit(overlay, (0, 0))
-            
-            # Large centered PAUSED text
-            pause_font = pygame.font.Font(None, 96)  # Larger font
-            pause_text = pause_font.render("PAUSED", True, WHITE)
-            text_rect = pause_text.get_rect(center=(self.width // 2, self.height // 2))
-            
-            # Add a subtle shadow effect
-            shadow_text = pause_font.render("PAUSED", True, (64, 64, 64))  # Dark gray shadow
-            shadow_rect = shadow_text.get_rect(center=(self.width // 2 + 3, self.height // 2 + 3))
-            self.screen.blit(shadow_text, shadow_rect)
-            
-            # Main text
-            self.screen.blit(pause_text, text_rect)
-            
-            # Instructions below
-            instruction_font = pygame.font.Font(None, 36)
-            instruction_text = instruction_font.render("Press P to Resume", True, LIGHT_GRAY)
-            instruction_rect = instruction_text.get_rect(center=(self.width // 2, self.height // 2 + 80))
-            self.screen.blit(instruction_text, instruction_rect)
+        """Render classic Tetris and return the dirty screen rects"""
+        if self.renderer is None:
+            return []
+        return self.renderer.draw(self)
     
     def restart(self):
         """Restart the game"""
-        self.board = [[None for _ in range(10)] for _ in range(20)]
-        self.score = 0
-        self.lines = 0
-        self.level = 0
-        self.fall_speed = 1.0
-        self.fall_time = 0
-        self.game_over = False
-        self.paused = False
-        self.spawn_piece()
-        self.audio.start_music()
+        self._save_replay()
+        self.engine.reset()
+        self._on_engine_event('restart')
     
     def cleanup(self):
         """Clean up resources"""
+        self._save_replay()
         self.audio.cleanup()
@@ -0,0 +1,71 @@
+from tetris.engine import TICK_RATE
+
+
+class RewindBuffer:
+    """Ring of the last `seconds` of per-tick engine snapshots
+
+    Each tick stores the fixed-size snapshot header (piece, score, timers)
+    in one preallocated bytearray - a single slice assignment, no per-tick
+    objects. The board changes only when a piece locks, so its packed cells
+    are taken only then and shared by every tick until the next change: on
+    a 300x2000 stress board that is one 300 KB copy per lock instead of one
+    per tick.
+    """
+
+    def __init__(self, engine, seconds=10.0):
+        self.engine = engine
+        self.size = len(engine.snapshot_state())
+        self.capacity = max(1, round(seconds * TICK_RATE))
+        self.data = bytearray(self.size * self.capacity)
+        self.boards = [None] * self.capacity  # Packed board per slot, shared between slots
+        self.head = 0  # Slot the next snapshot goes into
+        self.count = 0
+        # Packed board for engine.board_version `version`, reused while it holds
+        self.board = None
+        self.version = None
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+        self.boards = [None] * self.capacity
+
+    def record(self):
+        """Store the engine's current state as the newest snapshot"""
+        engine = self.engine
+        if engine.board_version != self.version:
+            self.board = engine.snapshot_board()
+            self.version = engine.board_version
+        offset = self.head * self.size
+        self.data[offset:offset + self.size] = engine.snapshot_state()
+        self.boards[self.head] = self.board
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def rewind(self, ticks=1):
+        """Step the engine back `ticks` recorded ticks (as far as the buffer goes)
+
+        Newer snapshots are dropped; the one restored stays as the newest.
+        The board is only reloaded when it differs from the one the engine
+        has. Returns False when there was nothing older to go back to.
+        """
+        ticks = min(ticks, self.count - 1)
+        if ticks <= 0:
+            return False
+        for _ in range(ticks):
+            self.head = (self.head - 1) % self.capacity
+            self.boards[self.head] = None
+        self.count -= ticks
+        slot = (self.head - 1) % self.capacity
+        offset = slot * self.size
+        header = self.data[offset:offset + self.size]
+        board = self.boards[slot]
+        engine = self.engine
+        if board is self.board and engine.board_version == self.version:
+            engine.restore_state(header)
+        else:
+            engine.restore(header + board)
+            self.board = board
+            self.version = engine.board_version
+        return True
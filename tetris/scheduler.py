@@ -0,0 +1,84 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """One worker thread running timed callbacks in due order
+
+    call_later() queues a callback with an optional tag; cancel(tag) drops
+    every pending callback with that tag at once. The worker waits on a
+    condition until the next due time, so cancelling or stopping wakes it
+    straight away instead of waiting out a sleep. The thread only starts
+    with the first callback, so a scheduler nobody uses costs nothing; once
+    stopped, it ignores new callbacks.
+
+    Callbacks run one at a time and should be short: one that blocks (a
+    winsound.Beep) holds back the ones due after it.
+    """
+
+    def __init__(self, name='scheduler'):
+        self.name = name
+        self.events = []  # Heap of (due, sequence, tag, callback, args)
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+
+    def call_later(self, delay, callback, *args, tag=None):
+        with self.condition:
+            if self.stopped:
+                return
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.thread.start()
+            heapq.heappush(self.events, (time.monotonic() + delay, next(self.sequence), tag, callback, args))
+            self.condition.notify()
+
+    def call_soon(self, callback, *args, tag=None):
+        self.call_later(0.0, callback, *args, tag=tag)
+
+    def cancel(self, tag):
+        """Drop every pending callback with this tag; returns how many"""
+        with self.condition:
+            kept = [event for event in self.events if event[2] != tag]
+            cancelled = len(self.events) - len(kept)
+            if cancelled:
+                heapq.heapify(kept)
+                self.events = kept
+            return cancelled
+
+    def stop(self, timeout=1.0):
+        """Drop everything pending and end the worker once its current callback returns"""
+        with self.condition:
+            thread, self.thread = self.thread, None
+            self.stopped = True
+            self.events = []
+            self.condition.notify()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self):
+        me = threading.current_thread()
+        condition = self.condition
+        while True:
+            with condition:
+                while True:
+                    if self.thread is not me:
+                        return  # Stopped
+                    if not self.events:
+                        condition.wait()
+                        continue
+                    delay = self.events[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    condition.wait(delay)
+                _, _, _, callback, args = heapq.heappop(self.events)
+            try:
+                callback(*args)
+            except Exception:
+                logger.exception("Scheduled %s failed", getattr(callback, '__qualname__', callback))
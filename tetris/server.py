@@ -0,0 +1,312 @@
+import argparse
+import asyncio
+import random
+import struct
+import sys
+from tetris.bitboard import BitBoard
+from tetris.engine import TetrisEngine, ACTION_PAUSE, ACTION_RESTART, TICK_SECONDS
+from tetris.pieces import PIECE_TYPES
+from tetris.timing import LatencyHistogram
+
+# Wire protocol (little-endian, TCP)
+#   client -> server: fixed 3-byte ACTION messages (action, input sequence number)
+#   server -> client: frames of a u16 payload length, a type byte and a body
+#     MATCH - seed, your player index
+#     STATE - one player's state; the board codes follow when it changed
+#     END   - winner's player index (NO_WINNER for a draw)
+ACTION = struct.Struct('<BH')
+FRAME_HEADER = struct.Struct('<HB')
+MATCH_BODY = struct.Struct('<IB')
+STATE_BODY = struct.Struct('<BIHIIHBbbBBB')
+END_BODY = struct.Struct('<B')
+MSG_MATCH, MSG_STATE, MSG_END = 1, 2, 3
+NO_WINNER = 0xFF
+
+# STATE flags
+FLAG_GAME_OVER = 1
+FLAG_BOARD = 2
+
+# Garbage rows sent for clearing 1-4 lines at once
+GARBAGE_FOR_LINES = [0, 0, 1, 2, 4]
+
+# Largest values the STATE fields hold; counters saturate rather than wrap
+MAX_U16, MAX_U32 = 0xFFFF, 0xFFFFFFFF
+
+# Clients that stop reading get dropped rather than buffered for forever
+MAX_WRITE_BUFFER = 1 << 16
+
+DEFAULT_PORT = 7777
+
+
+def frame(message_type, body):
+    return FRAME_HEADER.pack(len(body) + 1, message_type) + body
+
+
+async def read_frame(reader):
+    """Next (type, body) frame from a server stream"""
+    length, message_type = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    return message_type, await reader.readexactly(length - 1)
+
+
+def parse_state(body):
+    """STATE body -> dict (board is None when unchanged)"""
+    (player, tick, ack, score, lines, level, piece, x, y, rotation,
+     garbage, flags) = STATE_BODY.unpack_from(body)
+    return {
+        'player': player, 'tick': tick, 'ack': ack, 'score': score, 'lines': lines,
+        'level': level, 'piece': PIECE_TYPES[piece - 1] if piece else None,
+        'x': x, 'y': y, 'rotation': rotation, 'pending_garbage': garbage,
+        'game_over': bool(flags & FLAG_GAME_OVER),
+        'board': body[STATE_BODY.size:] if flags & FLAG_BOARD else None,
+    }
+
+
+class Player:
+    """One side of a match: its engine, connection and pending input"""
+
+    __slots__ = ('index', 'engine', 'writer', 'inputs', 'ack', 'lines_seen',
+                 'pending_garbage', 'sent_state', 'sent_board')
+
+    def __init__(self, index, writer, seed):
+        self.index = index
+        self.engine = TetrisEngine(board_class=BitBoard, seed=seed)
+        self.writer = writer
+        self.inputs = []  # (action, seq) applied at the next tick
+        self.ack = 0
+        self.lines_seen = 0
+        self.pending_garbage = 0
+        self.sent_state = None
+        self.sent_board = None
+
+
+class Match:
+    """Two players on the same seed; line clears send garbage across"""
+
+    def __init__(self, match_id, writers, seed):
+        self.match_id = match_id
+        self.seed = seed
+        self.players = [Player(i, writer, seed) for i, writer in enumerate(writers)]
+        self.holes = random.Random(seed)
+        self.tick_count = 0
+        self.finished = False
+
+    def start(self):
+        for player in self.players:
+            self.send(player, frame(MSG_MATCH, MATCH_BODY.pack(self.seed, player.index)))
+
+    def send(self, player, data):
+        writer = player.writer
+        if writer is None:
+            return
+        if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            writer.close()
+            player.writer = None
+            return
+        writer.write(data)
+
+    def tick(self):
+        """Advance both games one tick and push whatever changed"""
+        self.tick_count += 1
+        players = self.players
+        for player in players:
+            engine = player.engine
+            # Before the inputs: a hard drop locks inside apply()
+            pieces_before = engine.pieces_placed
+            for action, seq in player.inputs:
+                # No pausing or restarting a versus game
+                if action != ACTION_PAUSE and action != ACTION_RESTART:
+                    engine.apply(action)
+                player.ack = seq
+            player.inputs.clear()
+            engine.tick()
+
+            # Garbage lands once the receiver's piece locks
+            if engine.pieces_placed != pieces_before and player.pending_garbage:
+                engine.receive_garbage(player.pending_garbage, self.holes.randrange(engine.board.width))
+                player.pending_garbage = 0
+
+            cleared = engine.lines - player.lines_seen
+            if cleared:
+                player.lines_seen = engine.lines
+                opponent = players[1 - player.index]
+                # A board's height of garbage tops out, so more never needs queueing
+                opponent.pending_garbage = min(opponent.pending_garbage + GARBAGE_FOR_LINES[min(cleared, 4)],
+                                               opponent.engine.board.height)
+
+        for player in players:
+            self.broadcast_state(player)
+
+        over = [player.engine.game_over for player in players]
+        if any(over):
+            winner = NO_WINNER if all(over) else over.index(False)
+            self.finish(winner)
+
+    def broadcast_state(self, player):
+        """Send a player's state to both sides if it changed since last tick"""
+        engine = player.engine
+        state = (player.ack, min(engine.score, MAX_U32), min(engine.lines, MAX_U32), min(engine.level, MAX_U16),
+                 PIECE_TYPES.index(engine.current_type) + 1 if engine.current_type else 0,
+                 engine.current_x, engine.current_y, engine.current_rotation,
+                 min(player.pending_garbage, 255),
+                 FLAG_GAME_OVER if engine.game_over else 0)
+        board_changed = engine.board_version != player.sent_board
+        if state == player.sent_state and not board_changed:
+            return
+        player.sent_state = state
+
+        flags = state[-1]
+        board = b''
+        if board_changed:
+            player.sent_board = engine.board_version
+            flags |= FLAG_BOARD
+            board = engine.board.codes()
+        body = STATE_BODY.pack(player.index, self.tick_count, *state[:-1], flags) + board
+        data = frame(MSG_STATE, body)
+        for receiver in self.players:
+            self.send(receiver, data)
+
+    def finish(self, winner):
+        self.finished = True
+        data = frame(MSG_END, END_BODY.pack(winner))
+        for player in self.players:
+            self.send(player, data)
+            if player.writer is not None:
+                player.writer.close()  # Flushes the END frame first
+                player.writer = None
+
+    def disconnect(self, player):
+        player.writer = None
+        if not self.finished:
+            self.finish(1 - player.index)
+
+
+class TetrisServer:
+    """Hosts any number of two-player matches on one shared tick timer
+
+    Clients are paired in connection order. Every match advances on the same
+    asyncio timer task, so an idle match costs two engine ticks and a tuple
+    comparison per tick - no threads or per-match tasks besides the readers.
+    """
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, tick_seconds=TICK_SECONDS):
+        self.host = host
+        self.port = port
+        self.tick_seconds = tick_seconds
+        self.matches = {}
+        self.waiting = None  # (writer, future) of a client waiting for an opponent
+        self.next_match_id = 0
+
+        # How late each shared tick started, and how long it took (ms)
+        self.tick_lateness = LatencyHistogram(bin_ms=0.1, max_ms=100.0)
+        self.tick_duration = LatencyHistogram(bin_ms=0.1, max_ms=100.0)
+
+    async def handle_client(self, reader, writer):
+        """Pair the client into a match, then feed its actions in"""
+        loop = asyncio.get_running_loop()
+        read = None
+        if self.waiting is None:
+            paired = loop.create_future()
+            self.waiting = (writer, paired)
+            while not paired.done():
+                # Keep a read pending to notice the client leaving before an opponent turns up
+                if read is None:
+                    read = asyncio.ensure_future(reader.readexactly(ACTION.size))
+                await asyncio.wait({paired, read}, return_when=asyncio.FIRST_COMPLETED)
+                if read.done() and not paired.done():
+                    if read.exception() is not None:
+                        self.waiting = None
+                        writer.close()
+                        return
+                    read = None  # Actions sent before the match starts are dropped
+            match, player = paired.result()
+        else:
+            opponent_writer, opponent_future = self.waiting
+            self.waiting = None
+            match = self._create_match([opponent_writer, writer])
+            opponent_future.set_result((match, match.players[0]))
+            player = match.players[1]
+
+        try:
+            while not match.finished:
+                if read is not None:
+                    data, read = await read, None
+                else:
+                    data = await reader.readexactly(ACTION.size)
+                player.inputs.append(ACTION.unpack(data))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            match.disconnect(player)
+            writer.close()
+
+    def _create_match(self, writers):
+        self.next_match_id += 1
+        match = Match(self.next_match_id, writers, random.getrandbits(32))
+        self.matches[match.match_id] = match
+        match.start()
+        return match
+
+    async def run_ticks(self):
+        """Shared timer: tick every match, then sleep to the next deadline"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            now = loop.time()
+            self.tick_lateness.record(1000.0 * max(0.0, now - next_tick))
+            for match_id, match in list(self.matches.items()):
+                if match.finished:
+                    del self.matches[match_id]
+                else:
+                    match.tick()
+            self.tick_duration.record(1000.0 * (loop.time() - now))
+
+            next_tick += self.tick_seconds
+            delay = next_tick - loop.time()
+            if delay < -self.tick_seconds:
+                # Fell more than a tick behind: skip ahead instead of bursting
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(max(0.0, delay))
+
+    async def report_stats(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            lateness = self.tick_lateness.summary()
+            duration = self.tick_duration.summary()
+            print(f"{len(self.matches)} matches | tick lateness p50/p99 "
+                  f"{lateness.get('p50_ms', 0)}/{lateness.get('p99_ms', 0)} ms | "
+                  f"tick work p50/p99 {duration.get('p50_ms', 0)}/{duration.get('p99_ms', 0)} ms")
+            self.tick_lateness = LatencyHistogram(bin_ms=0.1, max_ms=100.0)
+            self.tick_duration = LatencyHistogram(bin_ms=0.1, max_ms=100.0)
+
+    async def serve(self, stats_interval=None):
+        server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        tasks = [asyncio.ensure_future(self.run_ticks())]
+        if stats_interval:
+            tasks.append(asyncio.ensure_future(self.report_stats(stats_interval)))
+        print(f"Retro Tetris versus server on {self.host}:{self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host Retro Tetris versus matches over TCP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--stats-interval', type=float, default=10.0,
+                        help="seconds between tick timing reports, 0 to disable (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(TetrisServer(args.host, args.port).serve(args.stats_interval))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
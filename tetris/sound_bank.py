@@ -0,0 +1,66 @@
+from collections import deque
+import pygame
+from tetris.synth import synthesize_melody
+
+# Channel kept free for the background music loop
+MUSIC_CHANNEL = 7
+
+EFFECT_VOLUME = 0.15
+EFFECT_FADE = 0.005  # Short fades keep clicks out without smearing the attack
+
+# Sound effects as (frequency, seconds) note lists
+EFFECTS = {
+    'line_clear': ((523, 0.06), (659, 0.06), (784, 0.12)),             # C5 E5 G5
+    'tetris': ((523, 0.06), (659, 0.06), (784, 0.06), (1047, 0.25)),   # C5 E5 G5 C6
+    'drop': ((110, 0.05),),                                            # A2 thud
+    'rotate': ((440, 0.03),),                                          # A4 tick
+    'pause': ((220, 0.15),),                                           # A3
+    'game_over': ((330, 0.2), (262, 0.2), (165, 0.5)),                 # E4 C4 E3
+}
+
+
+class ChannelPool:
+    """Hands out mixer channels for effects, never touching the music channel
+
+    When every effect channel is busy the one that started longest ago is
+    cut off and reused. The pool size is fixed, so play() is O(1).
+    """
+
+    def __init__(self, music_channel=MUSIC_CHANNEL):
+        total = pygame.mixer.get_num_channels()
+        self.channels = [pygame.mixer.Channel(i) for i in range(total) if i != music_channel]
+        # Indices into self.channels, least recently started first
+        self.order = deque(range(len(self.channels)))
+
+    def play(self, sound):
+        """Start a sound on an idle channel, stealing the oldest if none is free"""
+        if not self.channels:
+            return
+        for index in self.order:
+            if not self.channels[index].get_busy():
+                break
+        else:
+            index = self.order[0]
+
+        self.order.remove(index)
+        self.order.append(index)
+        # Playing on a busy channel stops whatever it was playing
+        self.channels[index].play(sound)
+
+
+class SoundBank:
+    """Sound effects synthesized once at startup and kept as mixer Sounds"""
+
+    def __init__(self, sample_rate, channels, music_channel=MUSIC_CHANNEL):
+        self.sounds = {
+            name: pygame.mixer.Sound(buffer=synthesize_melody(
+                notes, sample_rate, channels, EFFECT_VOLUME, EFFECT_FADE))
+            for name, notes in EFFECTS.items()
+        }
+        self.pool = ChannelPool(music_channel)
+
+    def play(self, name):
+        """Trigger an effect - no synthesis or I/O happens here"""
+        sound = self.sounds.get(name)
+        if sound is not None:
+            self.pool.play(sound)
@@ -0,0 +1,368 @@
+import argparse
+import bisect
+import sys
+from tetris.bitboard import BitBoard
+from tetris.board import pack_codes, unpack_codes
+from tetris.engine import TetrisEngine, TICK_RATE
+from tetris.pieces import PIECE_TYPES
+from tetris.replay import _read_varint, _write_varint
+
+# Record layout: flags byte, then for keyframes the absolute tick and the
+# whole state, for deltas a varint tick delta and only the flagged sections
+#   ROWS   - varint first changed row, varint mask of changed rows from it,
+#            then per row a varint cell mask and the filled cells' codes
+#            packed two per byte
+#   PIECE  - (type code | rotation << 4), x and y as zigzag varints
+#   SCORE  - zigzag varint score delta
+#   LINES  - varint lines delta, level byte
+#   STATUS - game over / paused bits
+KEYFRAME = 0x80
+ROWS = 0x01
+PIECE = 0x02
+SCORE = 0x04
+LINES = 0x08
+STATUS = 0x10
+
+STATUS_GAME_OVER = 1
+STATUS_PAUSED = 2
+
+# A keyframe every 10 seconds bounds how far a seek has to replay
+DEFAULT_KEYFRAME_INTERVAL = 600
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def _read_codes(data, pos, count):
+    """count packed cell codes at data[pos:]; returns (codes, new pos)"""
+    size = (count + 1) // 2
+    return bytearray(unpack_codes(data[pos:pos + size], count)), pos + size
+
+
+def _write_piece(out, piece):
+    packed, x, y = piece
+    out.append(packed)
+    _write_varint(out, _zigzag(x))
+    _write_varint(out, _zigzag(y))
+
+
+def _read_piece(data, pos, state):
+    packed = data[pos]
+    x, pos = _read_varint(data, pos + 1)
+    y, pos = _read_varint(data, pos)
+    state.piece = PIECE_TYPES[(packed & 0x0F) - 1] if packed & 0x0F else None
+    state.rotation, state.x, state.y = packed >> 4, _unzigzag(x), _unzigzag(y)
+    return pos
+
+
+class StreamState:
+    """Game state as rebuilt by the decoder"""
+
+    __slots__ = ('tick', 'width', 'height', 'board', 'piece', 'x', 'y', 'rotation',
+                 'score', 'lines', 'level', 'status')
+
+    def __init__(self):
+        self.tick = 0
+        self.width = self.height = 0
+        self.board = bytearray()  # Row-major cell codes, as Board.codes()
+        self.piece = None
+        self.x = self.y = self.rotation = 0
+        self.score = self.lines = self.level = 0
+        self.status = 0
+
+    @property
+    def game_over(self):
+        return bool(self.status & STATUS_GAME_OVER)
+
+    @property
+    def paused(self):
+        return bool(self.status & STATUS_PAUSED)
+
+    def copy(self):
+        state = StreamState()
+        for name in self.__slots__:
+            setattr(state, name, getattr(self, name))
+        state.board = bytearray(self.board)
+        return state
+
+
+def _piece_fields(engine):
+    code = PIECE_TYPES.index(engine.current_type) + 1 if engine.current_type else 0
+    return (code | (engine.current_rotation & 3) << 4, engine.current_x, engine.current_y)
+
+
+def _status(engine):
+    return (STATUS_GAME_OVER if engine.game_over else 0) | (STATUS_PAUSED if engine.paused else 0)
+
+
+class StateStreamEncoder:
+    """Turns an engine's state, sampled once per tick, into a compact stream
+
+    Call encode() after every engine tick; it returns the bytes to send
+    (empty when nothing changed). Rows are only compared when the engine's
+    board_version moved, so an idle tick costs a few comparisons.
+    """
+
+    def __init__(self, engine, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+        self.engine = engine
+        self.keyframe_interval = keyframe_interval
+        self.tick = -1
+        self.last_record_tick = 0
+        self.last_keyframe_tick = None
+        self.seed = None
+
+        self.rows = None
+        self.board_version = None
+        self.piece = None
+        self.score = self.lines = self.level = 0
+        self.status = None
+
+    def _board_rows(self):
+        codes = self.engine.board.codes()
+        width = self.engine.board.width
+        return [codes[i:i + width] for i in range(0, len(codes), width)]
+
+    def keyframe(self):
+        """Full-state record for the current tick"""
+        engine = self.engine
+        board = engine.board
+        self.rows = self._board_rows()
+        self.board_version = engine.board_version
+        self.piece = _piece_fields(engine)
+        self.score, self.lines, self.level = engine.score, engine.lines, engine.level
+        self.status = _status(engine)
+        self.seed = engine.seed
+        self.last_keyframe_tick = self.last_record_tick = self.tick
+
+        out = bytearray([KEYFRAME])
+        _write_varint(out, self.tick)
+        _write_varint(out, board.width)
+        _write_varint(out, board.height)
+        out += pack_codes(b''.join(self.rows))
+        _write_piece(out, self.piece)
+        _write_varint(out, self.score)
+        _write_varint(out, self.lines)
+        out += bytes((self.level & 0xFF, self.status))
+        return bytes(out)
+
+    def encode(self):
+        """Record for this tick: a keyframe, a delta, or b'' if unchanged"""
+        self.tick += 1
+        engine = self.engine
+        if (self.last_keyframe_tick is None or engine.seed != self.seed
+                or engine.score < self.score
+                or self.tick - self.last_keyframe_tick >= self.keyframe_interval):
+            return self.keyframe()
+
+        flags = 0
+        body = bytearray()
+        if engine.board_version != self.board_version:
+            self.board_version = engine.board_version
+            rows = self._board_rows()
+            changed = [y for y, row in enumerate(rows) if row != self.rows[y]]
+            if changed:
+                flags |= ROWS
+                # Masks start at the first changed row, so on tall boards
+                # they stay as short as the band that changed
+                first = changed[0]
+                _write_varint(body, first)
+                _write_varint(body, sum(1 << (y - first) for y in changed))
+                for y in changed:
+                    row = rows[y]
+                    _write_varint(body, sum(1 << x for x, code in enumerate(row) if code))
+                    body += pack_codes(bytes(code for code in row if code))
+                self.rows = rows
+
+        piece = _piece_fields(engine)
+        if piece != self.piece:
+            flags |= PIECE
+            _write_piece(body, piece)
+            self.piece = piece
+
+        if engine.score != self.score:
+            flags |= SCORE
+            _write_varint(body, _zigzag(engine.score - self.score))
+            self.score = engine.score
+
+        if engine.lines != self.lines or engine.level != self.level:
+            flags |= LINES
+            _write_varint(body, engine.lines - self.lines)
+            body.append(engine.level & 0xFF)
+            self.lines, self.level = engine.lines, engine.level
+
+        status = _status(engine)
+        if status != self.status:
+            flags |= STATUS
+            body.append(status)
+            self.status = status
+
+        if not flags:
+            return b''
+        out = bytearray([flags])
+        _write_varint(out, self.tick - self.last_record_tick)
+        self.last_record_tick = self.tick
+        return bytes(out + body)
+
+
+def decode_record(data, pos, state):
+    """Apply the record at data[pos:] to state in place; returns the next position"""
+    flags = data[pos]
+    pos += 1
+    if flags & KEYFRAME:
+        state.tick, pos = _read_varint(data, pos)
+        state.width, pos = _read_varint(data, pos)
+        state.height, pos = _read_varint(data, pos)
+        state.board, pos = _read_codes(data, pos, state.width * state.height)
+        pos = _read_piece(data, pos, state)
+        state.score, pos = _read_varint(data, pos)
+        state.lines, pos = _read_varint(data, pos)
+        state.level, state.status = data[pos], data[pos + 1]
+        return pos + 2
+
+    delta, pos = _read_varint(data, pos)
+    state.tick += delta
+    if flags & ROWS:
+        width = state.width
+        y, pos = _read_varint(data, pos)
+        rows, pos = _read_varint(data, pos)
+        while rows:
+            if rows & 1:
+                mask, pos = _read_varint(data, pos)
+                filled = bin(mask).count('1')
+                codes, pos = _read_codes(data, pos, filled)
+                row = bytearray(width)
+                column = 0
+                for code in codes:
+                    while not mask >> column & 1:
+                        column += 1
+                    row[column] = code
+                    column += 1
+                state.board[y * width:(y + 1) * width] = row
+            rows >>= 1
+            y += 1
+    if flags & PIECE:
+        pos = _read_piece(data, pos, state)
+    if flags & SCORE:
+        delta, pos = _read_varint(data, pos)
+        state.score += _unzigzag(delta)
+    if flags & LINES:
+        delta, pos = _read_varint(data, pos)
+        state.lines += delta
+        state.level = data[pos]
+        pos += 1
+    if flags & STATUS:
+        state.status = data[pos]
+        pos += 1
+    return pos
+
+
+class StateStreamDecoder:
+    """Rebuilds state from a stream, live (feed) or recorded (seek)
+
+    feed() applies records as they arrive; seek(tick) jumps anywhere in the
+    data seen so far by starting from the nearest keyframe at or before tick.
+    """
+
+    def __init__(self, data=b''):
+        self.data = bytearray()
+        self.pos = 0
+        self.state = StreamState()
+        self.keyframe_ticks = []
+        self.keyframe_offsets = []
+        self.feed(data)
+
+    def feed(self, data):
+        """Append complete records and apply them to the live state"""
+        self.data += data
+        while self.pos < len(self.data):
+            if self.data[self.pos] & KEYFRAME:
+                self.keyframe_offsets.append(self.pos)
+                self.pos = decode_record(self.data, self.pos, self.state)
+                self.keyframe_ticks.append(self.state.tick)
+            else:
+                self.pos = decode_record(self.data, self.pos, self.state)
+        return self.state
+
+    def nearest_keyframe(self, tick):
+        """Byte offset of the last keyframe at or before tick"""
+        index = bisect.bisect_right(self.keyframe_ticks, tick) - 1
+        if index < 0:
+            raise ValueError(f"no keyframe at or before tick {tick}")
+        return self.keyframe_offsets[index]
+
+    def seek(self, tick):
+        """State as of tick, decoded from the nearest keyframe forward"""
+        state = StreamState()
+        pos = self.nearest_keyframe(tick)
+        pos = decode_record(self.data, pos, state)
+        while pos < len(self.data):
+            # Peek at the next record's tick before applying it
+            flags = self.data[pos]
+            if flags & KEYFRAME:
+                next_tick, _ = _read_varint(self.data, pos + 1)
+            else:
+                delta, _ = _read_varint(self.data, pos + 1)
+                next_tick = state.tick + delta
+            if next_tick > tick:
+                break
+            pos = decode_record(self.data, pos, state)
+        return state
+
+
+def _matches(state, engine):
+    return (bytes(state.board) == engine.board.codes()
+            and state.piece == engine.current_type
+            and (state.x, state.y, state.rotation) == (engine.current_x, engine.current_y,
+                                                       engine.current_rotation)
+            and (state.score, state.lines, state.level) == (engine.score, engine.lines, engine.level)
+            and state.game_over == engine.game_over)
+
+
+def main(argv=None):
+    from tetris.bot import AutoPlayer
+
+    parser = argparse.ArgumentParser(description="Measure the state stream's bandwidth on a bot game")
+    parser.add_argument('--seconds', type=float, default=300.0, help="game time to stream (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keyframe-interval', type=int, default=DEFAULT_KEYFRAME_INTERVAL,
+                        help="ticks between keyframes (default: %(default)s)")
+    parser.add_argument('--verify', action='store_true',
+                        help="decode every tick and check it against the engine")
+    args = parser.parse_args(argv)
+
+    engine = TetrisEngine(board_class=BitBoard, seed=args.seed)
+    bot = AutoPlayer()
+    encoder = StateStreamEncoder(engine, args.keyframe_interval)
+    decoder = StateStreamDecoder()
+    stream = bytearray()
+    keyframe_bytes = 0
+    ticks = int(args.seconds * TICK_RATE)
+    for _ in range(ticks):
+        engine.apply(bot.next_action(engine))
+        engine.tick()
+        record = encoder.encode()
+        if record[:1] and record[0] & KEYFRAME:
+            keyframe_bytes += len(record)
+        stream += record
+        if args.verify:
+            decoder.feed(record)
+            if not _matches(decoder.state, engine):
+                print(f"Mismatch at tick {encoder.tick}")
+                return 1
+
+    seconds = ticks / TICK_RATE
+    print(f"{seconds:.0f}s of play, {engine.pieces_placed} pieces, {engine.lines} lines")
+    print(f"{len(stream)} bytes: {len(stream) / seconds:.0f} bytes/s "
+          f"({keyframe_bytes / seconds:.0f} bytes/s keyframes)")
+    if args.verify:
+        print("Decoded state matched the engine on every tick")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import hashlib
+import os
+from array import array
+
+# NumPy turns whole notes into array operations; pure Python is the fallback
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Simple Tetris melody - lowered by an octave for better sound
+MELODY = (
+    (330, 1.0),  # E4 (was 659 E5)
+    (247, 0.5),  # B3 (was 494 B4)
+    (262, 0.5),  # C4 (was 523 C5)
+    (294, 1.0),  # D4 (was 587 D5)
+    (262, 0.5),  # C4 (was 523 C5)
+    (247, 0.5),  # B3 (was 494 B4)
+    (220, 2.0),  # A3 (was 440 A4) - long note
+)
+
+MUSIC_VOLUME = 0.05  # Very quiet and smooth
+FADE_TIME = 0.1      # Seconds of fade in/out on every note
+
+# Bump when the waveform maths change so stale cache files are ignored
+SYNTH_VERSION = 1
+
+CACHE_DIR = os.environ.get(
+    'RETRO_TETRIS_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'retro_tetris'))
+
+# In-process memo: key -> 16-bit PCM bytes
+_memo = {}
+
+
+def _note_numpy(frequency, note_duration, start_time, sample_rate, volume, fade_time):
+    """Square-wave note with linear fade in/out, as int16 samples"""
+    note_frames = int(note_duration * sample_rate)
+    i = numpy.arange(note_frames)
+    t = start_time + (i / sample_rate)
+
+    square_wave = numpy.where((t * frequency) % 1 < 0.5, 1.0, -1.0)
+    fade = sample_rate * fade_time
+    envelope = volume * numpy.minimum(1.0, i / fade) * numpy.minimum(1.0, (note_frames - i) / fade)
+
+    return numpy.trunc(square_wave * envelope * 32767).astype(numpy.int16)
+
+
+def _note_python(frequency, note_duration, start_time, sample_rate, volume, fade_time):
+    """Pure Python version of _note_numpy"""
+    note_frames = int(note_duration * sample_rate)
+    fade = sample_rate * fade_time
+    samples = array('h', bytes(2 * note_frames))
+
+    for i in range(note_frames):
+        t = start_time + (i / sample_rate)
+        square_wave = 1 if (t * frequency) % 1 < 0.5 else -1
+        envelope = volume * min(1.0, i / fade) * min(1.0, (note_frames - i) / fade)
+        samples[i] = int(square_wave * envelope * 32767)
+    return samples
+
+
+def synthesize_melody(notes, sample_rate, channels=2, volume=MUSIC_VOLUME, fade_time=FADE_TIME):
+    """Render a list of (frequency, seconds) notes to interleaved 16-bit PCM bytes"""
+    note = _note_numpy if numpy is not None else _note_python
+    parts = []
+    current_time = 0
+    for frequency, note_duration in notes:
+        parts.append(note(frequency, note_duration, current_time, sample_rate, volume, fade_time))
+        current_time += note_duration
+
+    if numpy is not None:
+        mono = numpy.concatenate(parts)
+        # Same sample on every channel, interleaved
+        return numpy.repeat(mono, channels).astype('<i2').tobytes()
+
+    mono = array('h')
+    for part in parts:
+        mono.extend(part)
+    interleaved = array('h', bytes(2 * len(mono) * channels))
+    for channel in range(channels):
+        interleaved[channel::channels] = mono
+    if array('h', [1]).tobytes() != b'\x01\x00':
+        interleaved.byteswap()  # PCM is little-endian
+    return interleaved.tobytes()
+
+
+def _cache_path(key):
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+    sample_rate, channels = key[1], key[2]
+    return os.path.join(CACHE_DIR, f"music-{sample_rate}hz-{channels}ch-{digest}.pcm")
+
+
+def load_music_pcm(notes=MELODY, sample_rate=22050, channels=2, volume=MUSIC_VOLUME):
+    """PCM for a melody: memoized in memory and cached on disk across launches"""
+    key = (SYNTH_VERSION, sample_rate, channels, volume, tuple(notes))
+    pcm = _memo.get(key)
+    if pcm is not None:
+        return pcm
+
+    path = _cache_path(key)
+    expected_size = 2 * channels * sum(int(duration * sample_rate) for _, duration in notes)
+    try:
+        with open(path, 'rb') as f:
+            pcm = f.read()
+        if len(pcm) != expected_size:
+            pcm = None
+    except OSError:
+        pcm = None
+
+    if pcm is None:
+        pcm = synthesize_melody(notes, sample_rate, channels, volume)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # Write then rename so a crash never leaves a truncated file behind
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(pcm)
+            os.replace(temp_path, path)
+        except OSError:
+            pass  # Read-only home or full disk: the in-memory memo still helps
+
+    _memo[key] = pcm
+    return pcm
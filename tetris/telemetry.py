@@ -0,0 +1,143 @@
+import cProfile
+import csv
+import io
+import json
+import logging
+import pstats
+from array import array
+
+# Main-loop phases timed every frame, in order
+PHASES = ('events', 'update', 'render', 'present')
+# A frame is dropped when it took this many frame budgets: it missed a refresh
+DROPPED_FRAME_FACTOR = 1.5
+
+logger = logging.getLogger(__name__)
+
+
+class FrameTimings:
+    """Fixed-size ring buffer of per-frame timings (milliseconds)
+
+    record() takes one frame's phase durations and the interval since the
+    previous frame started (sleeping in clock.tick() included). Only the last
+    `size` frames are kept, so memory stays flat however long a cabinet runs;
+    the dropped-frame count covers the whole run.
+    """
+
+    columns = PHASES + ('interval',)
+
+    def __init__(self, size=3600, budget_ms=1000.0 / 60):
+        if size < 1:
+            raise ValueError(f"need room for at least one frame, got size {size}")
+        self.size = size
+        self.budget_ms = budget_ms
+        self.samples = {name: array('d', bytes(8 * size)) for name in self.columns}
+        self.count = 0
+        self.dropped = 0
+
+    def record(self, events, update, render, present, interval):
+        index = self.count % self.size
+        samples = self.samples
+        samples['events'][index] = events
+        samples['update'][index] = update
+        samples['render'][index] = render
+        samples['present'][index] = present
+        samples['interval'][index] = interval
+        self.count += 1
+        if interval > DROPPED_FRAME_FACTOR * self.budget_ms:
+            self.dropped += 1
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def series(self, name, last=None):
+        """Kept samples of one column (only the newest `last`, if given), oldest first"""
+        values = self.samples[name]
+        kept = len(self) if last is None else min(last, len(self))
+        end = self.count % self.size
+        if kept <= end:
+            return values[end - kept:end].tolist()
+        return values[end - kept:].tolist() + values[:end].tolist()
+
+    def percentiles(self, name, last=None):
+        """p50/p95/p99/max (ms) of one column over the kept (or newest `last`) frames"""
+        values = sorted(self.series(name, last))
+        if not values:
+            return {'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+        last = len(values) - 1
+        return {
+            'p50_ms': round(values[last * 50 // 100], 3),
+            'p95_ms': round(values[last * 95 // 100], 3),
+            'p99_ms': round(values[last * 99 // 100], 3),
+            'max_ms': round(values[last], 3),
+        }
+
+    def summary(self, last=None):
+        """Run totals plus percentiles over the kept frames, or only the newest `last`
+
+        Sorting all kept frames takes milliseconds at the default size, so
+        anything running every frame or so (the HUD) should pass `last`.
+        """
+        limit = DROPPED_FRAME_FACTOR * self.budget_ms
+        kept = len(self) if last is None else min(last, len(self))
+        return {
+            'frames': self.count,
+            'kept': kept,
+            'budget_ms': round(self.budget_ms, 3),
+            'dropped': self.dropped,
+            'dropped_kept': sum(1 for interval in self.series('interval', last) if interval > limit),
+            'phases': {name: self.percentiles(name, last) for name in self.columns},
+        }
+
+    def dump(self, path):
+        """Write the kept frames: CSV (one row per frame) for .csv paths, else JSON"""
+        first = self.count - len(self)
+        columns = [self.series(name) for name in self.columns]
+        rows = [[first + i] + [round(column[i], 3) for column in columns] for i in range(len(self))]
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.csv'):
+                writer = csv.writer(f)
+                writer.writerow(('frame',) + self.columns)
+                writer.writerows(rows)
+            else:
+                json.dump({'summary': self.summary(), 'columns': ('frame',) + self.columns,
+                           'frames': rows}, f, indent=1)
+
+
+class FrameProfiler:
+    """cProfile capture over the next `frames` frames, started on demand
+
+    start() (bound to a hotkey) begins a capture; frame_done() is called
+    once per frame and, when the capture is complete, writes the stats to
+    `path` (open with pstats or snakeviz) and logs the top entries.
+    """
+
+    def __init__(self, frames=300, path='frame_profile.prof'):
+        self.frames = frames
+        self.path = path
+        self.profile = None
+        self.remaining = 0
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def start(self):
+        if self.active:
+            return False
+        self.profile = cProfile.Profile()
+        self.remaining = self.frames
+        self.profile.enable()
+        return True
+
+    def frame_done(self):
+        if not self.active:
+            return
+        self.remaining -= 1
+        if self.remaining > 0:
+            return
+        profile, self.profile = self.profile, None
+        profile.disable()
+        profile.dump_stats(self.path)
+        top = io.StringIO()
+        pstats.Stats(profile, stream=top).sort_stats('cumulative').print_stats(15)
+        logger.info("Profiled %d frames into %s\n%s", self.frames, self.path, top.getvalue())
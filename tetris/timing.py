@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from tetris.engine import TICK_SECONDS
+
+# Longest frame the simulation catches up on; after a stall (window drag,
+# debugger) the game slows down instead of fast-forwarding through it
+MAX_FRAME_TIME = 0.25
+
+
+class FixedTimestep:
+    """Accumulator turning variable frame times into whole simulation ticks
+
+    advance(dt) returns how many ticks to run this frame; the leftover time
+    is kept for the next frame, so the tick rate averages out exactly no
+    matter how irregular frames are. alpha is how far the simulation is
+    into the next tick (0..1), for interpolating what gets drawn.
+    """
+
+    def __init__(self, step=TICK_SECONDS, max_frame_time=MAX_FRAME_TIME):
+        self.step = step
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.ticks = 0
+
+    def advance(self, dt):
+        """Add one frame's elapsed time; returns the number of ticks now due"""
+        self.accumulator += min(dt, self.max_frame_time)
+        due = int(self.accumulator // self.step)
+        self.accumulator -= due * self.step
+        self.ticks += due
+        return due
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.step
+
+    def reset(self):
+        self.accumulator = 0.0
+
+
+class LatencyHistogram:
+    """Fixed-bin latency histogram (milliseconds) with cheap percentiles
+
+    Samples past the last bin land in an overflow bin; percentiles report
+    bin upper edges, so they are accurate to bin_ms.
+    """
+
+    def __init__(self, bin_ms=1.0, max_ms=500.0):
+        self.bin_ms = bin_ms
+        self.bins = [0] * (int(max_ms / bin_ms) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        index = min(int(ms / self.bin_ms), len(self.bins) - 1)
+        self.bins[index] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p):
+        """Latency (ms) at or below which p percent of samples fall"""
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100.0
+        seen = 0
+        for index, n in enumerate(self.bins):
+            seen += n
+            if seen >= target:
+                return round(min((index + 1) * self.bin_ms, self.max), 3)
+        return round(self.max, 3)
+
+    def summary(self):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 3),
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': round(self.max, 3),
+        }
+
+    def to_dict(self):
+        data = self.summary()
+        data['bin_ms'] = self.bin_ms
+        # Sparse: only the bins that saw samples, keyed by their lower edge
+        data['bins'] = {f"{i * self.bin_ms:g}": n for i, n in enumerate(self.bins) if n}
+        return data
+
+
+def dump_histograms(path, histograms):
+    """Write named histograms as JSON"""
+    with open(path, 'w') as f:
+        json.dump({name: h.to_dict() for name, h in histograms.items()}, f, indent=2)
+
+
+class StartupProfile:
+    """Wall-clock phases of startup, recorded from whichever thread ran them
+
+    Times are seconds since `origin` (default: when the profile was made).
+    Phases carry the name of their thread, so work moved off the main
+    thread shows up as overlapping rather than adding to the first frame.
+    """
+
+    def __init__(self, origin=None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases = []  # (name, start, seconds, thread name); None seconds for marks
+
+    def add(self, name, start, end):
+        """Record a phase timed elsewhere, from perf_counter() readings"""
+        self.phases.append((name, start - self.origin, end - start, threading.current_thread().name))
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    def mark(self, name):
+        """Record a point in time (e.g. the first frame on screen)"""
+        self.phases.append((name, time.perf_counter() - self.origin, None, threading.current_thread().name))
+
+    def report(self):
+        """Lines of a table of phases and marks in start order (milliseconds)"""
+        lines = [f"{'startup':<20} {'at ms':>8} {'took ms':>8}  thread"]
+        for name, start, seconds, thread in sorted(self.phases, key=lambda phase: phase[1]):
+            took = f"{1000.0 * seconds:>8.1f}" if seconds is not None else f"{'-':>8}"
+            lines.append(f"{name:<20} {1000.0 * start:>8.1f} {took}  {thread}")
+        return lines
@@ -1,134 +1,201 @@
+import logging
 import pygame
 import threading
-import time
 import os
 import sys
+from tetris.mixer_profile import PROFILES, get_profile
+from tetris.scheduler import Scheduler
+from tetris.sound_bank import MUSIC_CHANNEL, SoundBank
+from tetris.synth import MELODY, load_music_pcm
+from tetris.timing import StartupProfile
+
+# Goes through tetris.log's queue when configured: no console I/O on the game thread
+logger = logging.getLogger(__name__)
+
+# Scheduler tags: music steps are cancelled together on stop, effects are not
+MUSIC = 'music'
+EFFECTS = 'effects'
+
+# Winsound melody as (Hz, ms) notes, then a rest before it loops
+BEEP_MELODY = [
+    (330, 400), (247, 200), (262, 200), (294, 400),  # E4, B3, C4, D4
+    (262, 200), (247, 200), (220, 800)               # C4, B3, A3
+]
+BEEP_REST = 1.0
+BEEP_EFFECTS = {'line_clear': 262, 'tetris': 523, 'pause': 220, 'game_over': 165}  # C4, C5, A3, E3
+
+# Visual-only mode: one beat every VISUAL_BEAT seconds, shown every 4th beat
+VISUAL_BEAT = 0.8
+VISUAL_SYMBOLS = ["♪", "♫", "♪♪", "♫♫", "♪♫", "♫♪", "♪♪♪"]
+
+class SilentAudio:
+    """No-op stand-in for UniversalAudio: headless games, servers, simulations"""
+    
+    __slots__ = ()
+    
+    # Always ready; shared because nothing ever waits on it
+    ready = threading.Event()
+    ready.set()
+    
+    def start_music(self):
+        pass
+    
+    def stop_music(self):
+        pass
+    
+    def pause_music(self):
+        pass
+    
+    def resume_music(self):
+        pass
+    
+    def play_sound(self, sound_name):
+        pass
+    
+    def cleanup(self):
+        pass
+
 
 class UniversalAudio:
     """Universal audio system that works across different environments"""
     
-    def __init__(self):
+    def __init__(self, profile=None, background=False, startup=None):
+        # Mixer settings: a PROFILES name or a MixerProfile (default 'balanced')
+        self.profile = get_profile(profile)
+        # Where mixer init and synthesis times are reported (--profile-startup)
+        self.startup = startup if startup is not None else StartupProfile()
         self.enabled = False
         self.music_playing = False
-        self.music_thread = None
-        self.stop_flag = False
+        # Melody steps, beeps and visual beats all run on this one thread;
+        # bumping music_generation turns steps already running into no-ops
+        self.scheduler = Scheduler("audio-scheduler")
+        self.music_generation = 0
         self.audio_method = None
+        self.music_sound = None
+        self.sound_bank = None
         
-        # Try different audio initialization methods
-        self._initialize_audio()
+        # Set once the mixer is open and sounds are built; music asked for
+        # before then starts when it is
+        self.ready = threading.Event()
+        self.music_wanted = False
+        self.lock = threading.RLock()
         
-        print(f"Universal audio system ready! Method: {self.audio_method}")
+        # In the background the window can show its first frame while the
+        # mixer opens and the music is synthesized
+        self.loader = None
+        if background:
+            self.loader = threading.Thread(target=self._load, name="audio-loader", daemon=True)
+            self.loader.start()
+        else:
+            self._load()
+    
+    def _load(self):
+        """Open the mixer and synthesize effects and music"""
+        with self.startup.phase('mixer init'):
+            self._initialize_audio()
+        
+        # Effects are synthesized once here, never on the game thread later
+        if self.audio_method.startswith("pygame"):
+            try:
+                with self.startup.phase('effect synthesis'):
+                    sample_rate, _, channels = pygame.mixer.get_init()
+                    self.sound_bank = SoundBank(sample_rate, channels, MUSIC_CHANNEL)
+            except Exception as e:
+                logger.warning("Sound effects unavailable: %s", e)
+            with self.startup.phase('music synthesis'):
+                self.create_simple_music_data()
+        
+        logger.info("Universal audio system ready! Method: %s", self.audio_method)
+        with self.lock:
+            self.ready.set()
+            self.startup.mark('audio ready')
+            if self.music_wanted:
+                self.music_wanted = False
+                self.start_music()
     
     def _initialize_audio(self):
         """Try different audio initialization approaches"""
         
-        # Method 1: Conservative pygame mixer
-        try:
-            pygame.mixer.pre_init(frequency=22050, size=-16, channels=2, buffer=4096)
-            pygame.mixer.init()
-            pygame.mixer.set_num_channels(8)
-            self.audio_method = "pygame_conservative"
-            self.enabled = True
-            print("✅ Using conservative pygame audio")
-            return
-        except Exception as e:
-            print(f"Conservative pygame failed: {e}")
+        # Method 1: Requested mixer profile, then the conservative one
+        profiles = [self.profile]
+        if self.profile is not PROFILES['conservative']:
+            profiles.append(PROFILES['conservative'])
+        
+        for profile in profiles:
+            try:
+                profile.init_mixer()
+                self.profile = profile
+                self.audio_method = f"pygame_{profile.name}"
+                self.enabled = True
+                logger.info("✅ Using %s pygame audio (%.0f ms buffer)", profile.name, profile.buffer_latency_ms)
+                return
+            except Exception as e:
+                logger.warning("%s pygame failed: %s", profile.name.capitalize(), e)
         
         # Method 2: Basic pygame mixer
         try:
             pygame.mixer.init()
             self.audio_method = "pygame_basic"
             self.enabled = True
-            print("✅ Using basic pygame audio")
+            logger.info("✅ Using basic pygame audio")
             return
         except Exception as e:
-            print(f"Basic pygame failed: {e}")
+            logger.warning("Basic pygame failed: %s", e)
         
-        # Method 3: Alternative audio (if available)
-        try:
-            import winsound
-            self.audio_method = "winsound"
-            self.enabled = True
-            print("✅ Using Windows winsound")
-            return
-        except ImportError:
-            pass
+        # Method 3: Alternative audio (Windows only - no import attempt elsewhere)
+        if sys.platform == 'win32':
+            try:
+                import winsound
+                self.audio_method = "winsound"
+                self.enabled = True
+                logger.info("✅ Using Windows winsound")
+                return
+            except ImportError:
+                pass
         
         # Method 4: Visual-only mode
         self.audio_method = "visual_only"
         self.enabled = True
-        print("✅ Using visual-only mode (no audio conflicts)")
+        logger.info("✅ Using visual-only mode (no audio conflicts)")
     
     def create_simple_music_data(self):
         """Create simple music data that should work universally"""
         if not self.enabled or self.audio_method == "visual_only":
             return None
         
+        # Built once per session; the PCM itself is also cached on disk
+        if self.music_sound is not None:
+            return self.music_sound
+        
         try:
-            # Create a very simple, short music loop
-            import math
-            import struct
-            
-            sample_rate = 22050
-            duration = 8.0  # 8 second loop
-            frames = int(duration * sample_rate)
-            
-            # Simple Tetris melody - lowered by an octave for better sound
-            notes = [
-                (330, 1.0),  # E4 (was 659 E5)
-                (247, 0.5),  # B3 (was 494 B4)
-                (262, 0.5),  # C4 (was 523 C5)
-                (294, 1.0),  # D4 (was 587 D5)
-                (262, 0.5),  # C4 (was 523 C5)
-                (247, 0.5),  # B3 (was 494 B4)
-                (220, 2.0),  # A3 (was 440 A4) - long note
-            ]
-            
-            wave_data = []
-            current_time = 0
-            
-            for frequency, note_duration in notes:
-                note_frames = int(note_duration * sample_rate)
-                
-                for i in range(note_frames):
-                    t = current_time + (i / sample_rate)
-                    
-                    # Simple square wave
-                    square_wave = 1 if (t * frequency) % 1 < 0.5 else -1
-                    
-                    # Very quiet and smooth
-                    volume = 0.05
-                    envelope = volume * min(1.0, i / (sample_rate * 0.1)) * min(1.0, (note_frames - i) / (sample_rate * 0.1))
-                    
-                    sample = int(square_wave * envelope * 32767)
-                    wave_data.extend([sample, sample])  # Stereo
-                
-                current_time += note_duration
-            
-            # Convert to bytes
-            packed_data = struct.pack('<' + 'h' * len(wave_data), *wave_data)
-            
-            # Create pygame sound
             if self.audio_method.startswith("pygame"):
-                return pygame.mixer.Sound(buffer=packed_data)
+                # Match the mixer's actual output format
+                sample_rate, _, channels = pygame.mixer.get_init()
+                pcm = load_music_pcm(MELODY, sample_rate, channels)
+                self.music_sound = pygame.mixer.Sound(buffer=pcm)
+                return self.music_sound
             
         except Exception as e:
-            print(f"Music creation failed: {e}")
+            logger.warning("Music creation failed: %s", e)
             return None
     
     def start_music(self):
         """Start background music with fallback methods"""
-        if not self.enabled or self.music_playing:
-            return
-        
-        if self.audio_method == "visual_only":
-            self._start_visual_music()
-            return
-        
-        if self.audio_method.startswith("pygame"):
-            self._start_pygame_music()
-        elif self.audio_method == "winsound":
-            self._start_winsound_music()
+        with self.lock:
+            if not self.ready.is_set():
+                self.music_wanted = True
+                return
+            if not self.enabled or self.music_playing:
+                return
+            
+            if self.audio_method == "visual_only":
+                self._start_visual_music()
+                return
+            
+            if self.audio_method.startswith("pygame"):
+                self._start_pygame_music()
+            elif self.audio_method == "winsound":
+                self._start_winsound_music()
     
     def _start_pygame_music(self):
         """Start pygame-based music"""
@@ -136,112 +203,112 @@ class UniversalAudio:
             music_sound = self.create_simple_music_data()
             if music_sound:
                 # Play on a dedicated channel with loop
-                channel = pygame.mixer.Channel(7)
+                channel = pygame.mixer.Channel(MUSIC_CHANNEL)
                 channel.play(music_sound, loops=-1)
                 self.music_playing = True
-                print("🎵 Pygame music started")
+                logger.info("🎵 Pygame music started")
             else:
                 self._start_visual_music()
         except Exception as e:
-            print(f"Pygame music failed: {e}")
+            logger.warning("Pygame music failed: %s", e)
             self._start_visual_music()
     
+    def _schedule_music(self, step, *args):
+        """Start a chain of music steps for the music starting now"""
+        self.scheduler.call_soon(self._music_step, self.music_generation, step, args, tag=MUSIC)
+    
+    def _music_step(self, generation, step, args):
+        """Run one step, then queue the next one unless the music stopped meanwhile
+        
+        Steps return (delay, args) for the next step. A step may block (a
+        beep) past a stop_music(); the generation check keeps it from
+        queueing into the music started after that.
+        """
+        if generation != self.music_generation:
+            return
+        delay, args = step(*args)
+        with self.lock:
+            if generation == self.music_generation:
+                self.scheduler.call_later(delay, self._music_step, generation, step, args, tag=MUSIC)
+    
     def _start_winsound_music(self):
         """Start Windows beep-based music"""
-        try:
-            self.stop_flag = False
-            self.music_thread = threading.Thread(target=self._winsound_music_loop, daemon=True)
-            self.music_thread.start()
-            self.music_playing = True
-            print("🎵 Windows beep music started")
-        except Exception as e:
-            print(f"Winsound music failed: {e}")
-            self._start_visual_music()
+        self.music_playing = True
+        self._schedule_music(self._winsound_note, 0)
+        logger.info("🎵 Windows beep music started")
     
-    def _winsound_music_loop(self):
-        """Simple beep melody loop"""
+    def _winsound_note(self, index):
+        """Beep one melody note"""
         import winsound
         
-        melody = [
-            (330, 400), (247, 200), (262, 200), (294, 400),  # E4, B3, C4, D4
-            (262, 200), (247, 200), (220, 800)               # C4, B3, A3
-        ]
-        
-        while not self.stop_flag:
-            for freq, duration in melody:
-                if self.stop_flag:
-                    break
-                try:
-                    winsound.Beep(int(freq), duration)
-                except:
-                    time.sleep(duration / 1000.0)
-            time.sleep(1.0)
+        freq, duration = BEEP_MELODY[index]
+        try:
+            winsound.Beep(freq, duration)  # Returns when the note ends
+            delay = 0.0
+        except RuntimeError:
+            delay = duration / 1000.0
+        index += 1
+        if index == len(BEEP_MELODY):
+            index = 0
+            delay += BEEP_REST
+        return delay, (index,)
     
     def _start_visual_music(self):
         """Start visual music display"""
-        try:
-            self.stop_flag = False
-            self.music_thread = threading.Thread(target=self._visual_music_loop, daemon=True)
-            self.music_thread.start()
-            self.music_playing = True
-            print("🎵 Visual music started")
-        except Exception as e:
-            print(f"Visual music failed: {e}")
+        self.music_playing = True
+        self._schedule_music(self._visual_beat, 0)
+        logger.info("🎵 Visual music started")
     
-    def _visual_music_loop(self):
-        """Visual music representation"""
-        melody_symbols = ["♪", "♫", "♪♪", "♫♫", "♪♫", "♫♪", "♪♪♪"]
-        index = 0
-        
-        while not self.stop_flag:
-            if index % 4 == 0:  # Every 4th beat
-                print(f"🎵 {melody_symbols[index % len(melody_symbols)]}", end=" ", flush=True)
-            index += 1
-            time.sleep(0.8)
+    def _visual_beat(self, index):
+        """Visual music representation: one beat"""
+        if index % 4 == 0:  # Every 4th beat
+            logger.info("🎵 %s", VISUAL_SYMBOLS[index % len(VISUAL_SYMBOLS)])
+        return VISUAL_BEAT, (index + 1,)
     
     def stop_music(self):
         """Stop music regardless of method"""
-        if not self.music_playing:
-            return
-        
-        self.stop_flag = True
-        self.music_playing = False
-        
-        if self.audio_method.startswith("pygame"):
-            try:
-                pygame.mixer.Channel(7).stop()
-            except:
-                pass
+        with self.lock:
+            self.music_wanted = False
+            if not self.music_playing:
+                return
+            
+            # Pending steps are dropped now, not when a sleep runs out
+            self.music_generation += 1
+            self.scheduler.cancel(MUSIC)
+            self.music_playing = False
+            
+            if self.audio_method.startswith("pygame"):
+                try:
+                    pygame.mixer.Channel(MUSIC_CHANNEL).stop()
+                except:
+                    pass
         
-        print("\n🎵 Music stopped")
+        logger.info("🎵 Music stopped")
     
     def play_sound(self, sound_name):
         """Play notification sounds with fallbacks"""
+        # Real sound effects: a non-blocking channel hand-off, nothing else
+        if self.sound_bank is not None:
+            self.sound_bank.play(sound_name)
+            return
+        
         # Visual feedback always works
         feedback = {
             'line_clear': "✨ LINE CLEARED! ✨",
+            'tetris': "✨ TETRIS! ✨",
             'pause': "⏸️ GAME PAUSED ⏸️",
             'game_over': "💀 GAME OVER 💀"
         }
         
         if sound_name in feedback:
-            print(f"\n{feedback[sound_name]}\n")
+            logger.info("%s", feedback[sound_name])
         
-        # Try audio feedback
-        if self.audio_method == "winsound":
-            try:
-                import winsound
-                frequencies = {'line_clear': 262, 'pause': 220, 'game_over': 165}  # C4, A3, E3
-                if sound_name in frequencies:
-                    winsound.Beep(frequencies[sound_name], 300)
-            except:
-                pass
-        elif self.audio_method.startswith("pygame"):
-            try:
-                # Simple beep using pygame
-                pass  # Could implement pygame beeps here
-            except:
-                pass
+        # Try audio feedback; Beep blocks for the whole note, so never here
+        if self.audio_method == "winsound" and sound_name in BEEP_EFFECTS:
+            import winsound
+            # Only the latest effect waits: pause spam must not queue up beeps
+            self.scheduler.cancel(EFFECTS)
+            self.scheduler.call_soon(winsound.Beep, BEEP_EFFECTS[sound_name], 300, tag=EFFECTS)
     
     def pause_music(self):
         """Pause music"""
@@ -254,6 +321,8 @@ class UniversalAudio:
     
     def cleanup(self):
         """Clean shutdown"""
+        if self.loader is not None:
+            # Don't close pygame under a mixer that is still opening
+            self.loader.join(timeout=5.0)
         self.stop_music()
-        if self.music_thread:
-            self.music_thread.join(timeout=1.0)
+        self.scheduler.stop()
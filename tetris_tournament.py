@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Headless tournament runner for Retro Tetris
+
+Plays M seeded games with a scripted or random policy across a process
+pool sized to the available cores, streams per-game results back as the
+workers finish and prints percentile statistics.
+
+    python tetris_tournament.py --games 100000 --policy bot
+    python tetris_tournament.py --games 1000 --policy random --json report.json
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tetris.bitboard import BitBoard
+from tetris.bot import AutoPlayer
+from tetris.cli import positive_int
+from tetris.engine import (TetrisEngine, ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN,
+                           ACTION_ROTATE, ACTION_NOOP, TICK_SECONDS)
+
+POLICIES = ('random', 'bot', 'bot-instant')
+METRICS = ('score', 'lines', 'level', 'pieces', 'game_seconds', 'elapsed')
+
+# Random policy: mostly let gravity work, otherwise mash a key
+RANDOM_ACTIONS = [ACTION_NOOP] * 6 + [ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE]
+
+
+def play_game(seed, policy, max_pieces):
+    """Play one game headless; returns its result row"""
+    start = time.perf_counter()
+    engine = TetrisEngine(board_class=BitBoard, seed=seed)
+
+    if policy == 'bot-instant':
+        # Pieces lock straight at the chosen spot, without gravity ticks
+        bot = AutoPlayer()
+        while not engine.game_over and engine.pieces_placed < max_pieces:
+            bot.play_piece(engine)
+    else:
+        if policy == 'bot':
+            next_action = AutoPlayer().next_action
+        else:
+            choice = random.Random(seed).choice
+            next_action = lambda engine: choice(RANDOM_ACTIONS)
+        apply = engine.apply
+        tick = engine.tick
+        while not engine.game_over and engine.pieces_placed < max_pieces:
+            apply(next_action(engine))
+            tick()
+
+    return {
+        'seed': seed,
+        'score': engine.score,
+        'lines': engine.lines,
+        'level': engine.level,
+        'pieces': engine.pieces_placed,
+        'game_seconds': round(engine.frame * TICK_SECONDS, 3),
+        'elapsed': round(time.perf_counter() - start, 6),
+    }
+
+
+def play_games(seeds, policy, max_pieces):
+    """Worker task: a chunk of games"""
+    return [play_game(seed, policy, max_pieces) for seed in seeds]
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not on Linux
+        return os.cpu_count() or 1
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(results):
+    """Per-metric mean, min, percentiles and max over all games (empty without games)"""
+    summary = {}
+    if not results:
+        return summary
+    for metric in METRICS:
+        values = sorted(row[metric] for row in results)
+        summary[metric] = {
+            'mean': round(sum(values) / len(values), 3),
+            'min': values[0],
+            'p10': percentile(values, 10),
+            'p50': percentile(values, 50),
+            'p90': percentile(values, 90),
+            'p99': percentile(values, 99),
+            'max': values[-1],
+        }
+    return summary
+
+
+def print_summary(summary, games, wall_seconds, workers):
+    print(f"\n{games} games in {wall_seconds:.1f}s on {workers} worker(s) "
+          f"({games / wall_seconds:.1f} games/s)\n")
+    columns = ('mean', 'min', 'p10', 'p50', 'p90', 'p99', 'max')
+    print(f"{'metric':<13}" + "".join(f"{c:>11}" for c in columns))
+    for metric, stats in summary.items():
+        print(f"{metric:<13}" + "".join(f"{stats[c]:>11g}" for c in columns))
+
+
+def run_tournament(games, policy='bot', seed=0, workers=None, chunk_size=None,
+                   max_pieces=1000, on_result=None):
+    """Play `games` games (seeds seed..seed+games-1); returns all result rows
+
+    on_result is called in the parent with each game's row as chunks arrive.
+    """
+    workers = workers or available_cores()
+    if chunk_size is None:
+        # Enough chunks to keep every worker busy, few enough to keep IPC cheap
+        chunk_size = max(1, min(256, games // (workers * 8)))
+
+    seeds = range(seed, seed + games)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_games, seeds[i:i + chunk_size], policy, max_pieces)
+                   for i in range(0, games, chunk_size)]
+        for future in as_completed(futures):
+            for row in future.result():
+                results.append(row)
+                if on_result is not None:
+                    on_result(row)
+    results.sort(key=lambda row: row['seed'])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run seeded Retro Tetris games headless in parallel")
+    parser.add_argument('--games', type=positive_int, default=1000, help="number of games (default: %(default)s)")
+    parser.add_argument('--policy', choices=POLICIES, default='bot',
+                        help="random: random keys each tick; bot: built-in AI through the tick loop; "
+                             "bot-instant: AI placements without gravity (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game (default: %(default)s)")
+    parser.add_argument('--workers', type=positive_int, help="worker processes (default: available cores)")
+    parser.add_argument('--chunk-size', type=positive_int, help="games per worker task")
+    parser.add_argument('--max-pieces', type=int, default=1000,
+                        help="stop a game after this many pieces (default: %(default)s)")
+    parser.add_argument('--json', metavar='PATH', help="write the summary report as JSON")
+    parser.add_argument('--csv', metavar='PATH', help="write per-game results as CSV")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or available_cores()
+    csv_file = writer = None
+    if args.csv:
+        csv_file = open(args.csv, 'w', newline='')
+        writer = csv.DictWriter(csv_file, fieldnames=('seed',) + METRICS)
+        writer.writeheader()
+
+    done = 0
+    progress_every = max(1, args.games // 20)
+
+    def on_result(row):
+        nonlocal done
+        done += 1
+        if writer is not None:
+            writer.writerow(row)
+        if done % progress_every == 0:
+            print(f"  {done}/{args.games} games", file=sys.stderr)
+
+    start = time.perf_counter()
+    try:
+        results = run_tournament(args.games, args.policy, args.seed, workers,
+                                 args.chunk_size, args.max_pieces, on_result)
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+    wall_seconds = time.perf_counter() - start
+
+    summary = summarize(results)
+    print_summary(summary, len(results), wall_seconds, workers)
+    if args.json:
+        report = {
+            'games': len(results),
+            'policy': args.policy,
+            'first_seed': args.seed,
+            'max_pieces': args.max_pieces,
+            'workers': workers,
+            'wall_seconds': round(wall_seconds, 3),
+            'summary': summary,
+        }
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved report to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())